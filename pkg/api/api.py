@@ -0,0 +1,79 @@
+"""
+Defines `analyze` and `build_bundle`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import os
+
+from interface.interface import Interface
+from astparser.astparser import AstParser
+from exception.exception import NoFunctionsFoundError
+
+LOGGER = logging.getLogger(__name__)
+
+# Marks a string which has been seen more than once. A dedicated object is
+# used because any string, including the empty string, is a valid function
+_TOMBSTONE = object()
+
+
+def analyze(paths):
+    """
+    Lazily extract every (file, function, string) occurrence from C files.
+
+    Intended for embedding IDA-CFP in other pipelines. Nothing is written
+    to out/ and the module-level `Record` is left untouched, so results can
+    be streamed straight into the caller's own store. Each file is only
+    loaded once the occurrences of the previous file have been consumed.
+
+    Files which contain no functions contribute no occurrences.
+
+    :param paths: iterable of file paths, or a single file path
+    :return: generator of tuples in the format (file, function, string)
+    """
+    # A lone path is far more likely than an iterable of single characters
+    if isinstance(paths, (str, bytes, os.PathLike)):
+        paths = [paths]
+
+    intr = Interface()
+    astp = AstParser()
+
+    for path in paths:
+        file_path = os.fsdecode(path)
+
+        try:
+            pairs = astp.extract_pairs(intr.load_new_ast(file_path))
+
+        except NoFunctionsFoundError:
+            continue
+
+        for func, string in pairs:
+            yield file_path, func, string
+
+
+def build_bundle(paths) -> dict:
+    """
+    Build the dictionary of unique strings: functions for C files.
+
+    The dictionary holds exactly what a regular run would drop to disk as
+    the bundle. Occurrences are consumed from `analyze` one at a time, and
+    only a single entry per distinct string is ever kept in memory.
+
+    :param paths: iterable of file paths, or a single file path
+    :return bundle: dictionary of unique strings: functions
+    """
+    owners = {}
+
+    for _, func, string in analyze(paths):
+
+        # A string is only unique when it occurs exactly once across every
+        # file, so a second sighting retires it for good
+        if string in owners:
+            owners[string] = _TOMBSTONE
+        else:
+            owners[string] = func
+
+    return {string: func for string, func in owners.items()
+            if func is not _TOMBSTONE}
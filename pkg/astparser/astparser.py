@@ -8,9 +8,9 @@ convention.
 import logging
 from abc import ABC
 import sys
-from pycparser import c_ast
 
 from verifier.verifier import Verifier
+from metrics.metrics import Metrics
 from record.record import Record
 from exception.exception import AstEmptyError
 
@@ -38,12 +38,44 @@ class AstParser(ABC):
         The internal state of the `ConstantVisitor` and `FuncDefVisitor`
         is not persisted between parsed files as __init__ is called.
 
+        The visitors derive from PycParser, by far the most expensive import
+        of the project, so they are only created once an AST is actually
+        walked. Frontends other than PycParser never import it at all.
+
         :return: returns nothing
         """
-        self.const_visitor = ConstantVisitor()
-        self.func_visitor = FuncDefVisitor()
+        self._const_visitor = None
+        self._func_visitor = None
+
+    @property
+    def const_visitor(self) -> "ConstantVisitor":
+        """
+        Create the `ConstantVisitor` on first use.
+
+        :return self._const_visitor: the `ConstantVisitor`
+        """
+        if self._const_visitor is None:
+            from astparser.visitors import ConstantVisitor
 
-    def process_ast(self, ast) -> None:
+            self._const_visitor = ConstantVisitor()
+
+        return self._const_visitor
+
+    @property
+    def func_visitor(self) -> "FuncDefVisitor":
+        """
+        Create the `FuncDefVisitor` on first use.
+
+        :return self._func_visitor: the `FuncDefVisitor`
+        """
+        if self._func_visitor is None:
+            from astparser.visitors import FuncDefVisitor
+
+            self._func_visitor = FuncDefVisitor()
+
+        return self._func_visitor
+
+    def process_ast(self, ast, file_path: str = "", events=None) -> None:
         """
         Process an AST by node using custom derived `Visitor`s.
 
@@ -56,6 +88,8 @@ class AstParser(ABC):
         For the above process, this function serves only as the moderator.
 
         :param ast: top-level AST generated as a result of parse_file
+        :param file_path: file the AST was generated from
+        :param events: optional `EventWriter` every occurrence is streamed to
         :return: returns nothing
         """
         # Unless the file is blank, there will always be a generated
@@ -63,14 +97,15 @@ class AstParser(ABC):
         if sys.getsizeof(ast) < AstParser.MIN_BYTES:
             raise AstEmptyError()
 
-        self.build_function_str_pairs(ast)
+        self.build_function_str_pairs(ast, file_path, events)
 
         # Opposite of the size check above, finding no strings within an
         # AST is perfectly reasonable, however it can be cause for concern
         if not Record.tpl_list:
             LOGGER.warning("No strings found in target file")
 
-    def build_function_str_pairs(self, ast) -> None:
+    def build_function_str_pairs(self, ast, file_path: str = "",
+                                 events=None) -> None:
         """
         Construct a list of tuples of functions: strings for an AST.
 
@@ -86,32 +121,98 @@ class AstParser(ABC):
         dictionary.
 
         :param ast: top-level AST generated as a result of parse_file
+        :param file_path: file the AST was generated from
+        :param events: optional `EventWriter` every occurrence is streamed to
+        :return: returns nothing
+        """
+        self.record_occurrences(self.extract_occurrences(ast), file_path,
+                                events)
+
+        # Clear all of the nodes and values for the ConstantVisitor
+        # and FuncDefVisitor instances
+        self.__init__()
+
+    @staticmethod
+    def record_occurrences(occurrences: list, file_path: str = "",
+                           events=None) -> None:
+        """
+        Add the occurrences found in a file to the master `Record` list.
+
+        Occurrences extracted elsewhere, such as in a worker process, are
+        added through here just like those of `build_function_str_pairs`.
+
+        :param occurrences: list of (function, string, line, column)
+        :param file_path: file the occurrences were found in
+        :param events: optional `EventWriter` every occurrence is streamed to
         :return: returns nothing
         """
-        function_list = self.locate_functions(ast)
-        function_strings = []
+        # Occurrences are streamed out as soon as a file is done, so the
+        # event stream never holds more than a single file in memory
+        if events:
+            events.write_occurrences(file_path, occurrences)
+
+        # The list of tuples is deliberately left unsorted here. Sorting
+        # the whole list after every file costs O(n log n) per file, while
+        # the stable sort of `integrate_list_to_dict` orders it just the
+        # same, once, at the end of the run
+        for function_name, function_str, _, _ in occurrences:
+            Record.add_func_str_to_list(function_name, function_str)
 
-        for function_node in function_list:
+        Metrics.count("occurrences_total", len(occurrences))
 
-            # Explicitly clearing the list of strings using clear() is
-            # unfortunately the most elegant way to ensure that no
-            # strings from the last function_node persist to the second
-            function_strings.clear()
-            function_strings = self.locate_func_strings(function_node)
+    def extract_pairs(self, ast) -> list:
+        """
+        Extract the function: string tuples of an AST without recording them.
 
-            for function_str in function_strings:
-                Record.add_func_str_to_list(function_node.decl.name,
-                                            function_str)
+        The tuples are returned in the order they are found, leaving it up
+        to the caller whether they are added to the `Record` list, kept on
+        a per-file basis or simply handed off elsewhere.
 
-        # While dictionaries are not inherently sortable, they do preserve
-        # their insertion order. Thus, keeping the list of tuples pre-sorted
-        # ensures that the final dictionary is at least somewhat in order
-        Record.sort_tmp_list()
+        :param ast: top-level AST generated as a result of parse_file
+        :return pairs: list of tuples in the format (function, string)
+        """
+        return [(func, string) for func, string, _, _
+                in self.extract_occurrences(ast)]
 
-        # Clear all of the nodes and values for the ConstantVisitor
-        # and FuncDefVisitor instances
+    def extract_occurrences(self, ast) -> list:
+        """
+        Extract every string occurrence of an AST along with its location.
+
+        :param ast: top-level AST generated as a result of parse_file
+        :return occurrences: list of tuples in the format
+            (function, string, line, column)
+        """
+        occurrences = []
+
+        for function_node in self.locate_functions(ast):
+            occurrences.extend(self.function_occurrences(function_node))
+
+        # The visitors accumulate nodes and values across calls, so they
+        # are reset before the next AST is handed over
         self.__init__()
 
+        return occurrences
+
+    def function_occurrences(self, function_node) -> list:
+        """
+        Extract the string occurrences of a single function definition.
+
+        :param function_node: `FuncDef` node
+        :return occurrences: list of tuples in the format
+            (function, string, line, column)
+        """
+        # Explicitly clearing the list of strings using clear() is
+        # unfortunately the most elegant way to ensure that no
+        # strings from the last function_node persist to the second
+        self.const_visitor.values.clear()
+        self.const_visitor.coords.clear()
+        function_strings = self.locate_func_strings(function_node)
+
+        return [(function_node.decl.name, function_str,
+                 coord.line if coord else 0, coord.column if coord else 0)
+                for function_str, coord in zip(function_strings,
+                                               self.const_visitor.coords)]
+
     def locate_functions(self, ast) -> list:
         """
         Locate all function definitions within an AST.
@@ -147,75 +248,3 @@ class AstParser(ABC):
         self.const_visitor.visit(node)
         return self.const_visitor.values
 
-
-class ConstantVisitor(c_ast.NodeVisitor):
-    """
-    Define the object responsible for locating constants in ASTs.
-
-    `ConstantVisitor` is the example derived `NodeVisitor` described
-    in the PycParser documentation at L:109
-    https://github.com/eliben/pycparser/blob/master/pycparser/c_ast.py
-    """
-
-    def __init__(self) -> None:
-        """
-        Initialize the `ConstantVisitor` object.
-
-        :return: returns nothing
-        """
-        self.values = []
-
-    def visit_Constant(self, node) -> None:
-        """
-        Create a list of values of the constant nodes encountered.
-
-        Does not traverse the children of nodes for which this function
-        was defined. To do that, call the base `NodeVisitor` member
-        function generic_visit() on the target node.
-
-        :param node: AST `FuncDef` node
-        :return: returns nothing
-        """
-        try:
-            # Ints are not captured as unique identifiers in IDA-CFP
-            # and thus must be removed from the list of potential
-            # unique constants
-            int(node.value)
-
-        except ValueError:
-            # When strings are found by traversal they are wrapped in an
-            # extra set of double quotes.
-            stripped = node.value.replace('"', '')
-            if stripped:
-                self.values.append(stripped)
-
-
-class FuncDefVisitor(c_ast.NodeVisitor):
-    """
-    Define the object responsible for locating function definitions in ASTs.
-
-    `FuncDefVisitor` is the example derived `NodeVisitor` described
-    in the PycParser documentation at L:25
-    https://github.com/eliben/pycparser/blob/master/examples/func_defs.py
-    """
-
-    def __init__(self) -> None:
-        """
-        Initialize the `FuncDefVisitor` object.
-
-        :return: returns nothing
-        """
-        self.nodes = []
-
-    def visit_FuncDef(self, node) -> None:
-        """
-        Create a list of `FuncDef` nodes encountered.
-
-        Does not traverse the children of nodes for which this function
-        was defined. To do that, call the base `NodeVisitor` member
-        function generic_visit() on the target node.
-
-        :param node: top-level AST generated as a result of parse_file
-        :return: returns nothing
-        """
-        self.nodes.append(node)
@@ -0,0 +1,90 @@
+"""
+Defines `ConstantVisitor` and `FuncDefVisitor`.
+
+Kept apart from `AstParser`, as deriving from PycParser's `NodeVisitor`
+means importing PycParser.
+"""
+
+from pycparser import c_ast
+
+from stoplist.stoplist import Stoplist
+
+
+class ConstantVisitor(c_ast.NodeVisitor):
+    """
+    Define the object responsible for locating constants in ASTs.
+
+    `ConstantVisitor` is the example derived `NodeVisitor` described
+    in the PycParser documentation at L:109
+    https://github.com/eliben/pycparser/blob/master/pycparser/c_ast.py
+
+    Strings on the loaded `Stoplist` are dropped as soon as they are
+    found, and never reach the `Record`.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the `ConstantVisitor` object.
+
+        `self.coords` holds the location of each entry of `self.values`.
+
+        :return: returns nothing
+        """
+        self.values = []
+        self.coords = []
+
+    def visit_Constant(self, node) -> None:
+        """
+        Create a list of values of the constant nodes encountered.
+
+        Does not traverse the children of nodes for which this function
+        was defined. To do that, call the base `NodeVisitor` member
+        function generic_visit() on the target node.
+
+        :param node: AST `FuncDef` node
+        :return: returns nothing
+        """
+        try:
+            # Ints are not captured as unique identifiers in IDA-CFP
+            # and thus must be removed from the list of potential
+            # unique constants
+            int(node.value)
+
+        except ValueError:
+            # When strings are found by traversal they are wrapped in an
+            # extra set of double quotes.
+            stripped = node.value.replace('"', '')
+            if stripped and not Stoplist.drops(stripped):
+                self.values.append(stripped)
+                self.coords.append(node.coord)
+
+
+class FuncDefVisitor(c_ast.NodeVisitor):
+    """
+    Define the object responsible for locating function definitions in ASTs.
+
+    `FuncDefVisitor` is the example derived `NodeVisitor` described
+    in the PycParser documentation at L:25
+    https://github.com/eliben/pycparser/blob/master/examples/func_defs.py
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the `FuncDefVisitor` object.
+
+        :return: returns nothing
+        """
+        self.nodes = []
+
+    def visit_FuncDef(self, node) -> None:
+        """
+        Create a list of `FuncDef` nodes encountered.
+
+        Does not traverse the children of nodes for which this function
+        was defined. To do that, call the base `NodeVisitor` member
+        function generic_visit() on the target node.
+
+        :param node: top-level AST generated as a result of parse_file
+        :return: returns nothing
+        """
+        self.nodes.append(node)
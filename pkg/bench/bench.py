@@ -0,0 +1,564 @@
+"""
+Defines `Bench`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import collections
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Bench(ABC):
+    """
+    Define the object responsible for benchmarking IDA-CFP.
+
+    Results are kept in a plain json format: a set of named stages, each
+    with the unit of its samples and one sample per repetition, along with
+    enough information about the machine to tell results apart.
+
+    `RUN_PY` is the entry point measured by default, the run.py next to
+    the project's modules.
+
+    `BASELINE_PATH` is where a baseline is stored for later runs to be
+    compared against, and `THRESHOLD` the relative slowdown of a stage
+    above which it is reported as a regression by default.
+
+    `T_95` holds the two-sided 95% critical values of Student's t
+    distribution for 1 to 30 degrees of freedom, as the statistics module
+    of older interpreters has no distributions to derive them from.
+    """
+
+    RESULTS_VERSION = 1
+    RUN_PY = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "run.py")
+
+    BASELINE_PATH = os.getcwd() + "/out/bench-baseline.json"
+    THRESHOLD = 0.05
+
+    T_95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262,
+            2.228, 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101,
+            2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052,
+            2.048, 2.045, 2.042)
+
+    @classmethod
+    def new_results(cls) -> dict:
+        """
+        Create an empty set of benchmark results.
+
+        :return results: results without any stages
+        """
+        return {"version": cls.RESULTS_VERSION,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "stages": {}}
+
+    @staticmethod
+    def add_samples(results: dict, stage: str, unit: str,
+                    samples: list) -> None:
+        """
+        Add the samples of a stage to a set of results.
+
+        :param results: results to add to
+        :param stage: name of the stage
+        :param unit: unit of every sample, such as "s"
+        :param samples: one measurement per repetition
+        :return: returns nothing
+        """
+        results["stages"].setdefault(stage, {"unit": unit, "samples": []})
+        results["stages"][stage]["samples"].extend(samples)
+
+    @staticmethod
+    def save(results: dict, file_path: str) -> None:
+        """
+        Write a set of results to disk.
+
+        :param results: results to write
+        :param file_path: path of the json file
+        :return: returns nothing
+        """
+        with open(file_path, "w") as outfile:
+            json.dump(results, outfile, indent=4, sort_keys=True)
+
+    @staticmethod
+    def load(file_path: str) -> dict:
+        """
+        Read a set of results from disk.
+
+        :param file_path: path of the json file
+        :return results: the results
+        """
+        with open(file_path) as infile:
+            return json.load(infile)
+
+    @classmethod
+    def save_baseline(cls, results: dict) -> None:
+        """
+        Store a set of results as the baseline of later comparisons.
+
+        :param results: results to store
+        :return: returns nothing
+        """
+        os.makedirs(os.path.dirname(cls.BASELINE_PATH), exist_ok=True)
+        cls.save(results, cls.BASELINE_PATH)
+
+        LOGGER.info("Stored baseline in %s", cls.BASELINE_PATH)
+
+    @staticmethod
+    def parse_importtime(stderr: str) -> dict:
+        """
+        Parse the output of `python -X importtime`.
+
+        :param stderr: standard error of the measured process
+        :return imports: dictionary of top-level module: cumulative seconds
+        """
+        imports = {}
+
+        for line in stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+
+            _, cumulative, name = line[len("import time:"):].split("|")
+
+            # Nested imports are indented below the module importing them,
+            # their time is already part of its cumulative time
+            if name.startswith(" ") and not name.startswith("  ") and \
+                    cumulative.strip().isdigit():
+                imports[name.strip()] = int(cumulative) / 1e6
+
+        return imports
+
+    @classmethod
+    def cold_start(cls, args: list, repeat: int = 10,
+                   entry: str = None) -> dict:
+        """
+        Measure the cold start of a fresh interpreter running IDA-CFP.
+
+        Every repetition starts a new `python -X importtime` process, so
+        both the total wall time and the time spent importing modules are
+        measured as a user invoking the program would experience them.
+
+        :param args: command line arguments handed to the entry point
+        :param repeat: number of processes to start
+        :param entry: run.py or zipapp to start, `RUN_PY` by default
+        :return results: results with the cold_start stages
+        """
+        results = cls.new_results()
+        command = [sys.executable, "-X", "importtime", entry or cls.RUN_PY]
+        walls = []
+        imports = []
+        slowest = {}
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process = subprocess.run(command + args, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.PIPE,
+                                     universal_newlines=True)
+            walls.append(time.perf_counter() - start)
+
+            modules = cls.parse_importtime(process.stderr)
+            imports.append(sum(modules.values()))
+
+            for name, seconds in modules.items():
+                slowest[name] = max(slowest.get(name, 0.0), seconds)
+
+        cls.add_samples(results, "cold_start", "s", walls)
+        cls.add_samples(results, "cold_start_imports", "s", imports)
+
+        results["slowest_imports"] = dict(sorted(
+            slowest.items(), key=lambda item: -item[1])[:10])
+
+        return results
+
+    @classmethod
+    def ingest(cls, num_files: int = 2000, per_file: int = 200,
+               per_file_sort: bool = False) -> dict:
+        """
+        Measure the time taken to add each file's occurrences to `Record`.
+
+        Synthetic occurrences are fed file by file, a tenth of their
+        strings shared with other files. The time per file should stay
+        flat however many files came before it. `per_file_sort` restores
+        the sort of the whole list after every file, which made the time
+        per file grow with the corpus, for comparison.
+
+        The results hold the ratio of the mean time per file of the last
+        tenth of files to that of the first tenth as "ingest_growth".
+
+        :param num_files: number of files fed
+        :param per_file: number of occurrences per file
+        :param per_file_sort: whether to sort the whole list after each file
+        :return results: results with the ingest_file and final_sort stages
+        """
+        from astparser.astparser import AstParser
+        from record.record import Record
+
+        results = cls.new_results()
+        Record.tpl_list = []
+        Record.str_func_dict = {}
+        samples = []
+
+        for index in range(num_files):
+            occurrences = [
+                ("func_{}_{}".format(index, number % 17),
+                 "shared {}".format(number) if number % 10 == 0 else
+                 "string {} {}".format(index, number), number, 0)
+                for number in range(per_file)]
+
+            start = time.perf_counter()
+            AstParser.record_occurrences(occurrences)
+            if per_file_sort:
+                Record.sort_tmp_list()
+            samples.append(time.perf_counter() - start)
+
+        # Only the one sort left at the end of a run is measured, rather
+        # than all of `integrate_list_to_dict`, whose exact uniqueness
+        # check would dwarf everything else
+        start = time.perf_counter()
+        Record.sort_tmp_list()
+        final_sort = time.perf_counter() - start
+
+        Record.tpl_list = []
+        Record.str_func_dict = {}
+
+        cls.add_samples(results, "ingest_file", "s", samples)
+        cls.add_samples(results, "final_sort", "s", [final_sort])
+
+        tenth = max(1, num_files // 10)
+        results["ingest_growth"] = (sum(samples[-tenth:]) /
+                                    max(sum(samples[:tenth]), 1e-12))
+
+        return results
+
+    @classmethod
+    def stages(cls, file_paths: list, repeat: int = 5,
+               entry: str = None) -> dict:
+        """
+        Measure each stage of a run over the same files, repeatedly.
+
+        The files are parsed once up front, and each repetition then times
+        the visitors extracting the occurrences of every AST, the `Record`
+        taking them in and integrating them, the `Interface` converting and
+        writing the bundle, and finally a whole run of a fresh process.
+        Bundles are written to a scratch directory, never to out/.
+
+        :param file_paths: files to run the stages over
+        :param repeat: number of samples taken of each stage
+        :param entry: run.py or zipapp of the end to end stage, `RUN_PY`
+            by default
+        :return results: results with the visitor, record, export and
+            end_to_end stages
+        """
+        from astparser.astparser import AstParser
+        from interface.interface import Interface
+        from record.record import Record
+
+        results = cls.new_results()
+        results["files"] = len(file_paths)
+        samples = {"visitor": [], "record": [], "export": [],
+                   "end_to_end": []}
+
+        intr = Interface()
+        asts = [intr.load_new_ast(file_path) for file_path in file_paths]
+
+        with tempfile.TemporaryDirectory() as directory:
+            intr.OUT_DIR = directory + os.sep
+            intr.OUT_FILE_PATH = os.path.join(directory, Interface.OUT_FILE)
+            command = [sys.executable, entry or cls.RUN_PY, "--output",
+                       os.path.join(directory, "end_to_end.json")]
+
+            for _ in range(repeat):
+                astp = AstParser()
+                start = time.perf_counter()
+                occurrences = [astp.extract_occurrences(ast) for ast in asts]
+                samples["visitor"].append(time.perf_counter() - start)
+
+                Record.tpl_list = []
+                Record.str_func_dict = {}
+                start = time.perf_counter()
+                for found in occurrences:
+                    AstParser.record_occurrences(found)
+                Record.integrate_list_to_dict()
+                samples["record"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                intr.convert_dict_to_json(Record.str_func_dict)
+                intr.drop_bundle_to_disk(intr.json_data)
+                samples["export"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                subprocess.run(command + file_paths, check=True,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+                samples["end_to_end"].append(time.perf_counter() - start)
+
+        Record.tpl_list = []
+        Record.str_func_dict = {}
+
+        for stage, stage_samples in samples.items():
+            cls.add_samples(results, stage, "s", stage_samples)
+
+        return results
+
+    @classmethod
+    def t_critical(cls, degrees: float) -> float:
+        """
+        Look up the two-sided 95% critical value of Student's t.
+
+        Beyond the table, the Cornish-Fisher expansion around the normal
+        quantile is accurate to well within the precision of the table.
+
+        :param degrees: degrees of freedom, rounded down when fractional
+        :return float: critical value
+        """
+        degrees = max(1, int(degrees))
+        if degrees <= len(cls.T_95):
+            return cls.T_95[degrees - 1]
+
+        z = 1.959964
+        return (z + (z ** 3 + z) / (4 * degrees) +
+                (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * degrees ** 2))
+
+    @classmethod
+    def compare(cls, baseline: dict, current: dict,
+                threshold: float = None) -> dict:
+        """
+        Compare every stage two sets of results have in common.
+
+        The difference of the mean of each stage is given relative to the
+        baseline, along with its 95% confidence interval from Welch's t
+        test, as the two sets of samples need not share a variance. Lower
+        is taken to be better for every stage.
+
+        A stage has regressed when it is slower by more than the threshold
+        and the whole interval lies above zero, so that noise alone never
+        fails a comparison. A stage with a single sample on either side
+        has no interval, and only the threshold applies to it.
+
+        :param baseline: results to compare against
+        :param current: results to compare
+        :param threshold: relative slowdown allowed, `THRESHOLD` by default
+        :return comparison: dictionary with a delta per stage, the stages
+            which regressed and the stages missing from either side
+        """
+        threshold = cls.THRESHOLD if threshold is None else threshold
+        comparison = {"threshold": threshold, "stages": {},
+                      "regressions": [], "missing": []}
+
+        for stage in sorted(set(baseline["stages"]) | set(current["stages"])):
+            if stage not in baseline["stages"] or \
+                    stage not in current["stages"]:
+                comparison["missing"].append(stage)
+                continue
+
+            before = baseline["stages"][stage]["samples"]
+            after = current["stages"][stage]["samples"]
+            mean_before = statistics.mean(before)
+            mean_after = statistics.mean(after)
+
+            margin = 0.0
+            if len(before) > 1 and len(after) > 1:
+                spread_before = statistics.variance(before) / len(before)
+                spread_after = statistics.variance(after) / len(after)
+                error = math.sqrt(spread_before + spread_after)
+
+                if error:
+                    degrees = error ** 4 / (
+                        spread_before ** 2 / (len(before) - 1) +
+                        spread_after ** 2 / (len(after) - 1))
+                    margin = cls.t_critical(degrees) * error
+
+            scale = mean_before or 1e-12
+            difference = mean_after - mean_before
+            delta = difference / scale
+            low = (difference - margin) / scale
+
+            regressed = delta > threshold and low > 0
+            comparison["stages"][stage] = {
+                "unit": current["stages"][stage]["unit"],
+                "baseline": mean_before, "current": mean_after,
+                "delta": delta, "low": low,
+                "high": (difference + margin) / scale,
+                "regressed": regressed}
+
+            if regressed:
+                comparison["regressions"].append(stage)
+
+        return comparison
+
+    @staticmethod
+    def summarize_comparison(comparison: dict) -> str:
+        """
+        Format a comparison as a human readable table.
+
+        :param comparison: comparison to format
+        :return text: one line per stage with its delta and interval
+        """
+        lines = []
+
+        for stage, data in comparison["stages"].items():
+            lines.append("{:<28} {:>12.6f} -> {:>12.6f} {:<3} {:>+8.1%} "
+                         "[{:+.1%}, {:+.1%}]{}".format(
+                             stage, data["baseline"], data["current"],
+                             data["unit"], data["delta"], data["low"],
+                             data["high"],
+                             "  REGRESSED" if data["regressed"] else ""))
+
+        for stage in comparison["missing"]:
+            lines.append("{:<28} only in one of the results".format(stage))
+
+        return "\n".join(lines)
+
+    @classmethod
+    def compare_frontends(cls, file_paths: list, extract=None) -> dict:
+        """
+        Run both frontends over the same files and compare their strings.
+
+        PycParser is run exactly as a bundle is extracted, which keeps any
+        constant `int` cannot parse, such as 0x10, 'a' or 1.5, whereas the
+        clang json frontend only reports string literals. Such constants
+        found by PycParser alone are the one expected divergence, listed
+        under "divergences" by file. Every other function: string pair
+        found by one frontend but not the other is listed under
+        "differences", by file. Each frontend is timed per file.
+
+        Any other frontend can stand in for clang json. Given
+        `pycparser_occurrences`, which is PycParser all over again, the
+        comparison checks itself: it must find no difference at all.
+
+        :param file_paths: files to parse with both frontends
+        :param extract: callable returning the occurrences of a file, that
+            of the clang json frontend by default
+        :return results: results with a stage per frontend, differences
+            and divergences
+        """
+        from astparser.astparser import AstParser
+        from clangjson.clangjson import ClangJson
+        from interface.interface import Interface
+
+        results = cls.new_results()
+        results["differences"] = {}
+        results["divergences"] = {}
+        intr = Interface()
+        astp = AstParser()
+        extract = extract or ClangJson().extract_occurrences
+        timings = {"pycparser": [], "clang-json": []}
+
+        for file_path in file_paths:
+            start = time.perf_counter()
+            ast = intr.load_new_ast(file_path)
+            expected = collections.Counter(
+                (func, string) for func, string, _, _
+                in astp.extract_occurrences(ast))
+            timings["pycparser"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            found = collections.Counter(
+                (func, string) for func, string, _, _
+                in extract(file_path))
+            timings["clang-json"].append(time.perf_counter() - start)
+
+            only_pycparser = expected - found
+            constants = only_pycparser & cls.pycparser_constants(
+                astp.locate_functions(ast))
+            only_pycparser -= constants
+
+            # Locating the functions again leaves them in the visitor, where
+            # the next file would pick them up along with its own
+            astp.__init__()
+
+            if constants:
+                results["divergences"][file_path] = {
+                    "only_pycparser_constants": sorted(constants.elements())}
+
+            if only_pycparser or found - expected:
+                results["differences"][file_path] = {
+                    "only_pycparser": sorted(only_pycparser.elements()),
+                    "only_clang_json": sorted((found - expected).elements())}
+
+        for frontend, samples in timings.items():
+            cls.add_samples(results, "frontend_" + frontend, "s", samples)
+
+        return results
+
+    @staticmethod
+    def pycparser_occurrences(file_path: str) -> list:
+        """
+        Extract the occurrences of a file through PycParser, from scratch.
+
+        :param file_path: file to parse
+        :return occurrences: list of tuples in the format
+            (function, string, line, column)
+        """
+        from astparser.astparser import AstParser
+        from interface.interface import Interface
+
+        return AstParser().extract_occurrences(
+            Interface().load_new_ast(file_path))
+
+    @staticmethod
+    def pycparser_constants(function_nodes: list) -> collections.Counter:
+        """
+        Count the constants other than strings PycParser keeps.
+
+        :param function_nodes: `FuncDef` nodes of a file
+        :return counts: counter of (function, constant): occurrences
+        """
+        from pycparser import c_ast
+
+        counts = collections.Counter()
+
+        for function_node in function_nodes:
+            nodes = [function_node]
+
+            while nodes:
+                node = nodes.pop()
+                nodes.extend(child for _, child in node.children())
+
+                if not isinstance(node, c_ast.Constant) or \
+                        node.type == "string":
+                    continue
+
+                # Filtered and stripped exactly as the `ConstantVisitor`
+                # filters and strips them
+                try:
+                    int(node.value)
+                except ValueError:
+                    stripped = node.value.replace('"', '')
+                    if stripped:
+                        counts[function_node.decl.name, stripped] += 1
+
+        return counts
+
+    @staticmethod
+    def summarize(results: dict) -> str:
+        """
+        Format a set of results as a human readable table.
+
+        :param results: results to format
+        :return text: one line per stage with its mean and spread
+        """
+        lines = []
+
+        for stage, data in sorted(results["stages"].items()):
+            samples = data["samples"]
+            mean = sum(samples) / len(samples)
+            lines.append("{:<28} {:>12.6f} {:<3} min {:.6f} max {:.6f} "
+                         "n={}".format(stage, mean, data["unit"],
+                                       min(samples), max(samples),
+                                       len(samples)))
+
+        return "\n".join(lines)
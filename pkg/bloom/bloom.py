@@ -0,0 +1,92 @@
+"""
+Defines `BloomFilter`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import hashlib
+import logging
+import math
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BloomFilter(ABC):
+    """
+    Define the object responsible for approximate set membership.
+
+    A `BloomFilter` answers whether a string may have been added before,
+    in a fixed number of bits no matter how long the strings are. It never
+    answers no for a string that was added, but may answer yes for one
+    that was not, at a rate close to the one it was sized for.
+
+    Bit positions are derived from a single keyed digest per string using
+    double hashing, rather than from `k` independent hash functions.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float) -> None:
+        """
+        Initialize the `BloomFilter` object.
+
+        `self.num_bits` and `self.num_hashes` are the optimal values for
+        holding `capacity` strings at a false-positive rate of `fp_rate`.
+
+        :param capacity: expected number of strings to be added
+        :param fp_rate: target false-positive rate, between 0 and 1
+        :return: returns nothing
+        """
+        if not 0 < fp_rate < 1:
+            raise ValueError("False-positive rate must be between 0 and 1")
+
+        capacity = max(capacity, 1)
+
+        self.num_bits = max(8, math.ceil(
+            -capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(
+            self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) >> 3)
+
+    def _positions(self, string: str) -> list:
+        """
+        Compute the bit positions of a string.
+
+        :param string: string to hash
+        :return positions: list of `self.num_hashes` bit positions
+        """
+        digest = hashlib.blake2b(string.encode("utf-8", "surrogatepass"),
+                                 digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + i * second) % self.num_bits
+                for i in range(self.num_hashes)]
+
+    def add(self, string: str) -> bool:
+        """
+        Add a string to the filter.
+
+        :param string: string to add
+        :return bool: true if the string may already have been present
+        """
+        present = True
+
+        for position in self._positions(string):
+            mask = 1 << (position & 7)
+
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                present = False
+
+        return present
+
+    def __contains__(self, string: str) -> bool:
+        """
+        Check whether a string may have been added to the filter.
+
+        :param string: string to check
+        :return bool: false if the string was definitely never added
+        """
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(string))
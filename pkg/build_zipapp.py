@@ -0,0 +1,165 @@
+"""
+Defines the single-file zipapp build.
+
+Bundles every IDA-CFP module, the fake libc headers and pycparser into
+one executable archive, dist/ida-cfp.pyz. Run it with any Python 3
+interpreter: python ida-cfp.pyz [options] files...
+
+Everything is pre-compiled and, for the PLY-based releases of pycparser,
+the lexer and parser tables are generated ahead of time, as neither can
+be cached from within an archive at run time.
+"""
+
+import compileall
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipapp
+
+import pycparser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TARGET = os.path.join(HERE, "dist", "ida-cfp.pyz")
+
+# Directories next to this script which are not part of the program
+EXCLUDED = {"build", "dist", "out", "utils", "__pycache__"}
+
+MAIN = '''"""Entry point of the IDA-CFP zipapp."""
+
+import os
+import sys
+
+ARCHIVE = os.path.dirname(os.path.abspath(__file__))
+FAKE_LIBC = "utils/fake_libc_include/"
+
+
+def fake_libc_dir() -> str:
+    """
+    Extract the fake libc headers once, as clang cannot read the archive.
+
+    :return path: directory of the extracted headers
+    """
+    stat = os.stat(ARCHIVE)
+    cache = os.path.join(os.path.expanduser("~"), ".cache", "ida-cfp",
+                         "%x-%x" % (stat.st_size, int(stat.st_mtime)))
+    target = os.path.join(cache, FAKE_LIBC)
+
+    if not os.path.isdir(target):
+        import tempfile
+        import zipfile
+
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(cache))
+
+        with zipfile.ZipFile(ARCHIVE) as archive:
+            archive.extractall(staging, [name for name in archive.namelist()
+                                         if name.startswith(FAKE_LIBC)])
+
+        # Another process may have won the race, which is just as good
+        try:
+            os.rename(staging, cache)
+        except OSError:
+            import shutil
+            shutil.rmtree(staging, ignore_errors=True)
+
+    return target
+
+
+if __name__ == "__main__":
+    from interface.interface import Interface
+    Interface.FAKE_LIBC_DIR = fake_libc_dir()
+
+    import run
+    sys.exit(run.main())
+'''
+
+
+def stage(staging: str) -> None:
+    """
+    Copy the program and its dependencies into a staging directory.
+
+    :param staging: directory the archive is built from
+    :return: returns nothing
+    """
+    ignore = shutil.ignore_patterns("__pycache__", "*.pyc")
+
+    for name in sorted(os.listdir(HERE)):
+        path = os.path.join(HERE, name)
+
+        if name not in EXCLUDED and \
+                os.path.isfile(os.path.join(path, "__init__.py")):
+            shutil.copytree(path, os.path.join(staging, name), ignore=ignore)
+
+    shutil.copy2(os.path.join(HERE, "run.py"), staging)
+    shutil.copytree(os.path.join(HERE, "utils", "fake_libc_include"),
+                    os.path.join(staging, "utils", "fake_libc_include"))
+
+    pycparser_dir = os.path.join(staging, "pycparser")
+    shutil.copytree(os.path.dirname(pycparser.__file__), pycparser_dir,
+                    ignore=ignore)
+
+    # Releases built on PLY generate their tables on first use, and would
+    # regenerate them on every single run from within the archive
+    if os.path.isdir(os.path.join(pycparser_dir, "ply")):
+        subprocess.check_call([
+            sys.executable, "-c",
+            "from pycparser import c_parser; c_parser.CParser("
+            "lex_optimize=True, yacc_optimize=True, yacc_debug=False, "
+            "taboutputdir=%r)" % pycparser_dir], cwd=staging)
+
+    with open(os.path.join(staging, "__main__.py"), "w") as outfile:
+        outfile.write(MAIN)
+
+
+def compile_sources(staging: str) -> None:
+    """
+    Compile every module to a legacy .pyc next to its source.
+
+    Archives cannot hold a __pycache__ written at run time, so without
+    these every module would be compiled again on every run. The source
+    timestamps are rounded to even seconds first, as that is all the zip
+    format can store and the .pyc records the timestamp of its source.
+
+    :param staging: directory the archive is built from
+    :return: returns nothing
+    """
+    for root, _, names in os.walk(staging):
+        for name in names:
+            path = os.path.join(root, name)
+            mtime = int(os.stat(path).st_mtime) & ~1
+            os.utime(path, (mtime, mtime))
+
+    # Tracebacks name the archive rather than the temporary directory
+    compileall.compile_dir(staging, ddir=os.path.basename(TARGET), quiet=1,
+                           legacy=True)
+
+
+def main() -> int:
+    """
+    Build dist/ida-cfp.pyz.
+
+    :return: returns 0 on success
+    """
+    staging = tempfile.mkdtemp()
+
+    try:
+        stage(staging)
+        compile_sources(staging)
+
+        os.makedirs(os.path.dirname(TARGET), exist_ok=True)
+
+        # Left uncompressed, which makes for the fastest imports
+        zipapp.create_archive(staging, TARGET,
+                              interpreter="/usr/bin/env python3")
+
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    print(TARGET)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
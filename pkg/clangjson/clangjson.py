@@ -0,0 +1,303 @@
+"""
+Defines `ClangJson`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import io
+import json
+import logging
+import re
+import subprocess
+import tempfile
+from abc import ABC
+
+from interface.interface import Interface
+from verifier.verifier import Verifier
+from stoplist.stoplist import Stoplist
+from exception.exception import FrontendError
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ClangJson(ABC):
+    """
+    Define the object responsible for the clang JSON AST frontend.
+
+    Rather than pre-processing a file for PycParser, which is strictly C99,
+    clang itself parses the file and dumps its AST as json. Anything clang
+    compiles, GNU extensions included, can then be processed.
+
+    Only string literals are extracted. PycParser also keeps every other
+    constant `int` cannot parse, such as 0x10, 'a' or 1.5, which the dump
+    spells by value rather than as written, so bundles of the two
+    frontends differ by exactly those constants.
+
+    The dump of a file including a few system headers easily runs into
+    hundreds of megabytes, so it is never loaded as a whole. `iter_tokens`
+    reads it from the pipe in chunks and yields one token at a time, and
+    `extract_from_tokens` keeps no more than the chain of nodes leading to
+    the current one.
+
+    Locations in the dump are delta-encoded: a "line" or "file" is only
+    written when it differs from the location written before it. The
+    current line and file are therefore tracked across the whole stream.
+
+    `TOKEN` matches a single json token, skipping the whitespace, commas
+    and colons before it. Its groups are punctuation, the body of a string
+    and any other scalar, of which exactly one is set.
+    """
+
+    TOKEN = re.compile(
+        r'[\s,:]*(?:([{}\[\]])|"([^"\\]*(?:\\.[^"\\]*)*)"|'
+        r'([^\s,:{}\[\]"]+))')
+    CHUNK_SIZE = 1 << 20
+
+    # Keys under which an object is a source location rather than a node
+    LOCATION_KEYS = frozenset(("loc", "begin", "end", "spellingLoc",
+                               "expansionLoc"))
+
+    def __init__(self) -> None:
+        """
+        Initialize the `ClangJson` object.
+
+        :return: returns nothing
+        """
+        self.clang_path = Interface.CLANG_PATH
+
+    def extract_occurrences(self, file_path: str) -> list:
+        """
+        Extract every string occurrence of a file through clang.
+
+        :param file_path: file to be parsed
+        :return occurrences: list of tuples in the format
+            (function, string, line, column)
+        """
+        # Diagnostics go to a file rather than a pipe, as a full stderr
+        # pipe would block clang while it is being read from stdout
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(
+                [self.clang_path, "-Xclang", "-ast-dump=json",
+                 "-fsyntax-only", file_path],
+                stdout=subprocess.PIPE, stderr=errors)
+
+            try:
+                stream = io.TextIOWrapper(process.stdout, encoding="utf-8",
+                                          errors="replace")
+                functions, occurrences = self.extract_from_tokens(
+                    self.iter_tokens(stream))
+
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+
+            if returncode:
+                errors.seek(0)
+                raise FrontendError(file_path, errors.read().decode(
+                    "utf-8", "replace").strip())
+
+        Verifier.check_num_function_names(functions)
+
+        return occurrences
+
+    @classmethod
+    def iter_tokens(cls, stream):
+        """
+        Iterate the tokens of a json document read from a stream.
+
+        A json string cannot hold a raw line break, so a line break is
+        always a boundary between tokens. Each chunk is tokenized up to
+        its last line break, and whatever follows is carried over to the
+        next. As clang writes its dump one line per key, a chunk is never
+        held back for more than a line.
+
+        :param stream: text stream of json
+        :return: generator of tuples in the format (punctuation, string,
+            scalar), of which exactly one is not empty
+        """
+        rest = ""
+
+        while True:
+            chunk = stream.read(cls.CHUNK_SIZE)
+            if not chunk:
+                break
+
+            cut = chunk.rfind("\n")
+            if cut < 0:
+                rest += chunk
+                continue
+
+            yield from cls.TOKEN.findall(rest + chunk[:cut])
+            rest = chunk[cut:]
+
+        yield from cls.TOKEN.findall(rest)
+
+    @classmethod
+    def extract_from_tokens(cls, tokens) -> tuple:
+        """
+        Extract string occurrences from the tokens of a clang AST dump.
+
+        Every json object is pushed onto a stack as a frame of the form
+        [key, kind, node], where `key` is the key it is found under in its
+        parent (arrays pass theirs on to their elements), `kind` is one of
+        "node", "location" or None and `node` holds what is known of a
+        node: its kind, name, line, column and whether it stems from an
+        included file. Arrays are pushed as frames of the form [key, "array",
+        None].
+
+        A node is any object in an "inner" array, and the string literals
+        of a function are those found anywhere beneath its `FunctionDecl`.
+        Functions defined by included files are left out, just as PycParser
+        only ever sees the functions of the file itself.
+
+        :param tokens: tokens as generated by `iter_tokens`
+        :return tuple: list of defined function names and list of tuples in
+            the format (function, string, line, column)
+        """
+        functions = []
+        occurrences = []
+        stack = []
+        key = None
+        expect_key = False
+        line = column = 0
+        included = False
+
+        for punctuation, string, scalar in tokens:
+
+            if punctuation == "{" or punctuation == "[":
+                if not stack:
+                    parent_key = None
+                elif stack[-1][1] == "array":
+                    parent_key = stack[-1][0]
+                else:
+                    parent_key = key
+
+                if punctuation == "[":
+                    stack.append([parent_key, "array", None])
+                    expect_key = False
+                    continue
+
+                if parent_key in cls.LOCATION_KEYS:
+                    stack.append([parent_key, "location", None])
+                elif parent_key == "inner" or not stack:
+                    stack.append([parent_key, "node",
+                                  {"kind": None, "name": None, "line": None,
+                                   "column": None, "included": False,
+                                   "implicit": False}])
+                else:
+                    # A location within an included file says which file
+                    # included it, which is all that is needed of it
+                    if parent_key == "includedFrom":
+                        included = True
+                    stack.append([parent_key, None, None])
+
+                expect_key = True
+                continue
+
+            if punctuation:
+                frame = stack.pop()
+
+                # The location of a node is its own "loc" or, for nodes
+                # which have none such as expressions, the beginning of
+                # its range
+                if frame[1] == "location" and frame[0] in ("loc", "begin"):
+                    for outer in reversed(stack):
+                        if outer[1] == "node":
+                            node = outer[2]
+                            if node["line"] is None:
+                                node["line"] = line
+                                node["column"] = column
+                                node["included"] = included
+                            break
+
+                elif frame[1] == "node" and frame[2]["kind"] == \
+                        "FunctionDecl":
+                    node = frame[2]
+                    if node["name"] and not node["included"] and \
+                            not node["implicit"]:
+                        functions.append(node["name"])
+
+                expect_key = bool(stack) and stack[-1][1] != "array"
+                continue
+
+            if expect_key:
+                key = string
+                expect_key = False
+                continue
+
+            # What remains is a scalar value under `key`
+            expect_key = stack[-1][1] != "array"
+            frame = stack[-1]
+
+            if frame[1] == "location":
+                if key == "line":
+                    line = int(scalar)
+                elif key == "col":
+                    column = int(scalar)
+                elif key == "file":
+                    included = False
+
+            elif frame[1] == "node":
+                node = frame[2]
+
+                if key == "kind":
+                    node["kind"] = string
+                elif key == "name":
+                    node["name"] = cls.decode(string)
+                elif key == "isImplicit":
+                    node["implicit"] = scalar == "true"
+                elif key == "value" and node["kind"] == "StringLiteral":
+                    occurrence = cls.locate_occurrence(stack, cls.decode(
+                        string))
+                    if occurrence and not Stoplist.drops(occurrence[1]):
+                        occurrences.append(occurrence)
+
+        return functions, occurrences
+
+    @staticmethod
+    def locate_occurrence(stack: list, value: str) -> tuple:
+        """
+        Attribute a string literal to the function it is found in.
+
+        The literal is stripped of its double quotes exactly as the
+        `ConstantVisitor` strips those of PycParser constants.
+
+        :param stack: frames leading up to the string literal
+        :param value: C spelling of the literal, double quotes included
+        :return occurrence: tuple in the format (function, string, line,
+            column), or None if the literal is not within a function
+        """
+        nodes = [frame[2] for frame in stack if frame[1] == "node"]
+        literal = nodes[-1]
+
+        # __func__ and friends are spelled out as a literal of their own,
+        # which PycParser only ever sees as an identifier
+        if len(nodes) > 1 and nodes[-2]["kind"] == "PredefinedExpr":
+            return None
+
+        stripped = value.replace('"', '')
+        if not stripped:
+            return None
+
+        for node in reversed(nodes):
+            if node["kind"] == "FunctionDecl":
+                if node["included"]:
+                    return None
+                return (node["name"], stripped, literal["line"] or 0,
+                        literal["column"] or 0)
+
+        return None
+
+    @staticmethod
+    def decode(string: str) -> str:
+        """
+        Decode the body of a json string.
+
+        :param string: body of a json string, without its double quotes
+        :return str: the decoded string
+        """
+        if "\\" not in string:
+            return string
+
+        return json.loads('"' + string + '"')
@@ -6,10 +6,13 @@ convention.
 """
 
 import logging
+import time
 from abc import ABC
 
-from interface.interface import Interface
+from interface.interface import Interface, EventWriter
 from astparser.astparser import AstParser
+from metrics.metrics import Metrics
+from partial.partial import Partial
 from record.record import Record
 from exception.exception import NoFilesSpecifiedError
 
@@ -27,9 +30,19 @@ class Core(ABC):
     While the instances of `Interface` and `AstParser` can be explicitly
     accessed by other third-party code, this is not recommended as both
     objects contain no (strict) immutable state.
+
+    `FRONTENDS` are the ways a file can be parsed: by PycParser from the
+    output of the clang pre-processor, or by clang itself through its
+    json AST dump.
     """
 
-    def __init__(self) -> None:
+    FRONTENDS = ("pycparser", "clang-json")
+
+    def __init__(self, events_path: str = None, store_path: str = None,
+                 partial_path: str = None, batch_size: int = 1,
+                 supervisor=None, progress=None,
+                 frontend: str = "pycparser", prescan: bool = False,
+                 func_cache=None) -> None:
         """
         Initialize the `Core` object.
 
@@ -44,10 +57,69 @@ class Core(ABC):
         is responsible for processing and understanding the abstract
         syntax tree (AST) that PycParser generates.
 
+        `self._events` contains an optional `EventWriter`, to which every
+        occurrence found is streamed while the files are processed.
+
+        `self._store` contains an optional SQLite `Store`. When present,
+        occurrences are kept in the database rather than in the `Record`
+        list of tuples, and the bundle is exported from a query.
+
+        `self._partial_path` contains an optional path of a `Partial`
+        result, which is written instead of a bundle so that it can be
+        merged with the results of other runs.
+
+        `self._batch_size` contains the number of files handed to each
+        clang invocation. Batching saves a process spawn for every file.
+
+        `self._supervisor` contains an optional `Supervisor`. When present,
+        each file is extracted in a worker process under its limits, and a
+        file which fails is reported rather than ending the run.
+
+        `self._progress` contains an optional `Progress`, which is told
+        whenever a file is begun and ended.
+
+        `self._clang` contains a `ClangJson` frontend when files are parsed
+        by clang rather than by PycParser.
+
+        `self._prescan` decides whether files which cannot contain a string
+        literal are skipped before anything is spawned for them.
+
+        `self._func_cache` contains an optional `FuncCache`. When present,
+        files are pre-processed separately from parsing, so that unchanged
+        files need not be parsed and unchanged functions need not be
+        walked.
+
+        :param events_path: optional path of an NDJSON event stream
+        :param store_path: optional path of a SQLite occurrence store
+        :param partial_path: optional path of a partial result
+        :param batch_size: number of files pre-processed per clang process
+        :param supervisor: optional `Supervisor` isolating each file
+        :param progress: optional `Progress` display
+        :param frontend: one of `FRONTENDS`
+        :param prescan: whether files without strings are skipped
+        :param func_cache: optional `FuncCache` of previous extractions
         :return: returns nothing
         """
         self._intr = Interface()
         self._astp = AstParser()
+        self._events = EventWriter(events_path) if events_path else None
+        self._store = None
+        if store_path:
+            # SQLite is only imported when a store is actually used
+            from store.store import Store
+
+            self._store = Store(store_path)
+        self._partial_path = partial_path
+        self._batch_size = batch_size
+        self._supervisor = supervisor
+        self._progress = progress
+        self._clang = None
+        if frontend == "clang-json":
+            from clangjson.clangjson import ClangJson
+
+            self._clang = ClangJson()
+        self._prescan = prescan
+        self._func_cache = func_cache
 
     def process_files(self, files: list) -> None:
         """
@@ -65,15 +137,272 @@ class Core(ABC):
         if not files:
             raise NoFilesSpecifiedError()
 
-        for f_str in files:
-            ast = self._intr.load_new_ast(f_str.name)
-            self._astp.process_ast(ast)
+        if self._progress:
+            self._progress.start()
+
+        try:
+            file_paths = [f.name for f in files]
+            if self._prescan:
+                file_paths = self.skip_stringless(file_paths)
+
+            if self._supervisor:
+                self.process_isolated(file_paths)
+            else:
+                self.process_in_place(file_paths)
+
+        finally:
+            # Events of the files processed so far are still worth keeping
+            # should a later file fail
+            if self._events:
+                self._events.close()
+            if self._progress:
+                self._progress.close()
+
+            # Whatever was extracted before a failure is still valid
+            if self._func_cache:
+                self._func_cache.save()
+
+        # Uniqueness is decided by the database itself
+        if self._store:
+            self._store.commit()
+            return
+
+        # With a memory limit, uniqueness is decided while merging the
+        # spilled runs during `export`. A partial result needs to know
+        # about every string, not just the unique ones
+        if Record.memory_limit or self._partial_path:
+            return
 
         # Rather than attempt to integrate the list and dict after
         # every file, it saves huge computational complexity to just
         # condense the operation and only do it once per run
         Record.integrate_list_to_dict()
 
+    def skip_stringless(self, file_paths: list) -> list:
+        """
+        Leave out the files which cannot contain a string literal.
+
+        :param file_paths: files to be processed
+        :return file_paths: files which may contain strings
+        """
+        from prescan.prescan import Prescan
+
+        kept, skipped = Prescan.split(file_paths)
+
+        for file_path in skipped:
+            # Whatever a skipped file contributed to a previous run of
+            # the same database no longer holds
+            if self._store:
+                self._store.replace_file(file_path, [])
+            if self._progress:
+                self._progress.end(file_path)
+
+        Metrics.count("files_skipped_total", len(skipped))
+        if skipped:
+            LOGGER.warning("Prescan skipped %d of %d files without strings",
+                           len(skipped), len(file_paths))
+
+        return kept
+
+    def process_in_place(self, file_paths: list) -> None:
+        """
+        Process files one after the other within this process.
+
+        :param file_paths: files to be processed
+        :return: returns nothing
+        """
+        if self._clang:
+            self.process_dumped(file_paths)
+            return
+
+        if self._func_cache:
+            self.process_cached(file_paths)
+            return
+
+        for file_path, ast in self.iter_asts(file_paths):
+            start = time.perf_counter()
+
+            if self._store:
+                self.store_ast(ast, file_path)
+            else:
+                self._astp.process_ast(ast, file_path, self._events)
+                Record.spill_if_needed()
+
+            Metrics.observe("extract", time.perf_counter() - start)
+            Metrics.count("files_processed_total")
+
+            if self._progress:
+                self._progress.end(file_path)
+
+    def process_isolated(self, file_paths: list) -> None:
+        """
+        Process files through the worker processes of the `Supervisor`.
+
+        Workers hand back the occurrences of each file, which are added
+        to the `Store` or `Record` exactly as if found in this process.
+
+        :param file_paths: files to be processed
+        :return: returns nothing
+        """
+        started = self._progress.begin if self._progress else None
+
+        for file_path, occurrences in self._supervisor.run(file_paths,
+                                                           started):
+            if self._progress:
+                self._progress.end(file_path)
+
+            # The `Supervisor` has already reported a file which failed
+            if occurrences is None:
+                continue
+
+            Metrics.count("files_processed_total")
+            self.add_occurrences(file_path, occurrences)
+
+    def process_dumped(self, file_paths: list) -> None:
+        """
+        Process files one after the other through the clang json frontend.
+
+        The AST dump is parsed as it streams in, so dumping and extracting
+        make up a single stage.
+
+        :param file_paths: files to be processed
+        :return: returns nothing
+        """
+        for file_path in file_paths:
+            if self._progress:
+                self._progress.begin(file_path)
+
+            start = time.perf_counter()
+            occurrences = self._clang.extract_occurrences(file_path)
+            Metrics.observe("parse", time.perf_counter() - start)
+
+            self.add_occurrences(file_path, occurrences)
+            Metrics.count("files_processed_total")
+
+            if self._progress:
+                self._progress.end(file_path)
+
+    def process_cached(self, file_paths: list) -> None:
+        """
+        Process files one after the other through the `FuncCache`.
+
+        :param file_paths: files to be processed
+        :return: returns nothing
+        """
+        for file_path, text in self.iter_preprocessed(file_paths):
+            start = time.perf_counter()
+            occurrences = self._func_cache.extract(file_path, text,
+                                                   self._intr, self._astp)
+            Metrics.observe("extract", time.perf_counter() - start)
+
+            self.add_occurrences(file_path, occurrences)
+            Metrics.count("files_processed_total")
+
+            if self._progress:
+                self._progress.end(file_path)
+
+    def add_occurrences(self, file_path: str, occurrences: list) -> None:
+        """
+        Add occurrences extracted without an AST of this process.
+
+        :param file_path: file the occurrences were found in
+        :param occurrences: list of (function, string, line, column)
+        :return: returns nothing
+        """
+        if self._store:
+            self.store_occurrences(file_path, occurrences)
+        else:
+            self._astp.record_occurrences(occurrences, file_path,
+                                          self._events)
+            Record.spill_if_needed()
+
+    def iter_asts(self, file_paths: list):
+        """
+        Load the AST of each file, pre-processing files in batches.
+
+        Regardless of batching, ASTs are loaded lazily and in order, and a
+        file which fails raises its error only once its turn comes.
+
+        :param file_paths: files to be parsed
+        :return: generator of tuples in the format (file path, AST)
+        """
+        if self._batch_size <= 1:
+            for file_path in file_paths:
+                if self._progress:
+                    self._progress.begin(file_path)
+
+                start = time.perf_counter()
+                ast = self._intr.load_new_ast(file_path)
+                Metrics.observe("parse", time.perf_counter() - start)
+
+                yield file_path, ast
+            return
+
+        for file_path, text in self.iter_preprocessed(file_paths):
+            start = time.perf_counter()
+            ast = self._intr.parse_text(text, file_path)
+            Metrics.observe("parse", time.perf_counter() - start)
+
+            yield file_path, ast
+
+    def iter_preprocessed(self, file_paths: list):
+        """
+        Pre-process each file, in batches of `self._batch_size` files.
+
+        :param file_paths: files to be pre-processed
+        :return: generator of tuples in the format (file path, text)
+        """
+        batch_size = max(1, self._batch_size)
+
+        for start in range(0, len(file_paths), batch_size):
+            batch = file_paths[start:start + batch_size]
+
+            # The files of a batch are all in progress at once
+            if self._progress:
+                for file_path in batch:
+                    self._progress.begin(file_path)
+
+            start = time.perf_counter()
+            if len(batch) > 1:
+                outputs = self._intr.preprocess_batch(batch)
+            else:
+                outputs = {batch[0]: self._intr.preprocess(batch[0])}
+
+            # Every file of a batch is charged an equal share of its time
+            share = (time.perf_counter() - start) / len(batch)
+            for _ in batch:
+                Metrics.observe("preprocess", share)
+
+            for file_path in batch:
+                if isinstance(outputs[file_path], Exception):
+                    raise outputs[file_path]
+
+                yield file_path, outputs[file_path]
+
+    def store_ast(self, ast, file_path: str) -> None:
+        """
+        Add every occurrence found in an AST to the SQLite `Store`.
+
+        :param ast: top-level AST generated as a result of parse_file
+        :param file_path: file the AST was generated from
+        :return: returns nothing
+        """
+        self.store_occurrences(file_path, self._astp.extract_occurrences(ast))
+
+    def store_occurrences(self, file_path: str, occurrences: list) -> None:
+        """
+        Add the occurrences found in a file to the SQLite `Store`.
+
+        :param file_path: file the occurrences were found in
+        :param occurrences: list of (function, string, line, column)
+        :return: returns nothing
+        """
+        if self._events:
+            self._events.write_occurrences(file_path, occurrences)
+
+        Metrics.count("occurrences_total", len(occurrences))
+        self._store.replace_file(file_path, occurrences)
+
     def generate_bundle(self) -> None:
         """
         Generate the bundle interface for disk I/O.
@@ -84,6 +413,11 @@ class Core(ABC):
 
         :return: returns nothing
         """
+        # With a `Store` or a memory limit the bundle is streamed straight
+        # to disk by `export`, there is no dictionary to convert
+        if self._store or Record.memory_limit:
+            return
+
         self._intr.convert_dict_to_json(Record.str_func_dict)
 
     def export(self) -> None:
@@ -95,4 +429,83 @@ class Core(ABC):
 
         :return: returns nothing
         """
+        if self._store:
+            self.count_store_tombstones()
+            self._intr.stream_bundle_to_disk(Metrics.counted(
+                "unique_strings", self._store.unique_pairs()))
+            return
+
+        if Record.memory_limit:
+            self._intr.stream_bundle_to_disk(Metrics.counted(
+                "unique_strings", Record.iter_unique_pairs()))
+            return
+
+        Metrics.set("unique_strings", len(Record.str_func_dict))
         self._intr.drop_bundle_to_disk(self._intr.json_data)
+
+    def export_shards(self, num_shards: int) -> None:
+        """
+        Export the final bundle to disk as a set of shards.
+
+        Utilize the `Interface`-based file-I/O system to drop the master
+        `Record` dictionary to out/shards/, hash-partitioned into
+        `num_shards` files plus a manifest.
+
+        :param num_shards: total number of shards
+        :return: returns nothing
+        """
+        if self._store:
+            self.count_store_tombstones()
+            data = dict(self._store.unique_pairs())
+        elif Record.memory_limit:
+            data = dict(Record.iter_unique_pairs())
+        else:
+            data = Record.str_func_dict
+
+        Metrics.set("unique_strings", len(data))
+        self._intr.drop_shards_to_disk(data, num_shards)
+
+    def count_store_tombstones(self) -> None:
+        """
+        Set the metric of strings the `Store` leaves out of the bundle.
+
+        The `Record` counts these while deciding uniqueness, whereas the
+        `Store` needs a query of its own, only run when metrics are kept.
+
+        :return: returns nothing
+        """
+        if Metrics.enabled:
+            Metrics.set("tombstoned_strings", self._store.count_tombstoned())
+
+    def export_partial(self) -> None:
+        """
+        Export a mergeable partial result instead of a bundle.
+
+        Utilize `Partial` to write how often each string occurred, and
+        where it occurred when only once, so that the results of several
+        runs over slices of a corpus can later be merged into one bundle.
+
+        :return: returns nothing
+        """
+        if self._store:
+            Partial.write(self._partial_path, self._store.string_summaries())
+            return
+
+        try:
+            Partial.write(self._partial_path,
+                          Partial.summarize(Record.iter_sorted_pairs()))
+
+        finally:
+            Record.remove_runs()
+
+    def close(self) -> None:
+        """
+        Release what the files were processed into.
+
+        The `Store` is only closed once the bundle has been exported from
+        it, which checkpoints its write-ahead log into the database.
+
+        :return: returns nothing
+        """
+        if self._store:
+            self._store.close()
@@ -71,6 +71,44 @@ class FilePermissionsError(CustomBaseError):
         LOGGER.critical(message)
 
 
+class PreprocessError(CustomBaseError):
+    """Raised in the event clang fails to pre-process a file."""
+
+    def __init__(self, file_path, message) -> None:
+        """
+        Initialize, call base constructor and log critical message.
+
+        :param file_path: file which failed to be pre-processed
+        :param message: custom exception message to alert and log
+        :return: returns nothing
+        """
+        # Call the super class constructor with the parameters it requires
+        super(PreprocessError, self).__init__(file_path + ": " + message)
+
+        self.file_path = file_path
+
+        LOGGER.critical("%s: %s", file_path, message)
+
+
+class FrontendError(CustomBaseError):
+    """Raised in the event clang fails to dump the AST of a file."""
+
+    def __init__(self, file_path, message) -> None:
+        """
+        Initialize, call base constructor and log critical message.
+
+        :param file_path: file whose AST failed to be dumped
+        :param message: custom exception message to alert and log
+        :return: returns nothing
+        """
+        # Call the super class constructor with the parameters it requires
+        super(FrontendError, self).__init__(file_path + ": " + message)
+
+        self.file_path = file_path
+
+        LOGGER.critical("%s: %s", file_path, message)
+
+
 class AstEmptyError(CustomBaseError):
     """Raised in the event an AST is less than the minimum required bytes."""
 
@@ -0,0 +1,196 @@
+"""
+Defines `FuncCache`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+from abc import ABC
+
+from interface.interface import Interface
+from stoplist.stoplist import Stoplist
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FuncCache(ABC):
+    """
+    Define the object responsible for re-extracting only changed functions.
+
+    For each file, the cache holds a digest of its pre-processed text and,
+    for each function, a digest of the function's span together with the
+    strings extracted from it. The span of a function runs, in the
+    pre-processed text, from its first line up to the first line of the
+    next function, so macros are hashed as expanded and a change to a
+    header is noticed just the same.
+
+    A file whose pre-processed text is unchanged is not parsed at all.
+    PycParser cannot parse a function apart from the declarations before
+    it, so any other file is parsed in full, but only the functions whose
+    span changed are walked for strings. The rest reuse their cached
+    strings, their lines moved along with the function.
+
+    The cache is kept in memory and, given a path, persisted as json
+    between runs. `VERSION` is bumped whenever the format changes, which
+    discards older caches. The strings cached depend on the `Stoplist`
+    too, so a cache persisted under any other stoplist is discarded.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_path: str = None) -> None:
+        """
+        Initialize the `FuncCache` object, loading a persisted cache.
+
+        `self.entries` maps each file path to its pre-processed digest and
+        its functions, and `self.stats` counts how files and functions were
+        served during this run.
+
+        :param cache_path: optional path of the persisted json cache
+        :return: returns nothing
+        """
+        self.cache_path = cache_path
+        self.entries = {}
+        self.stats = {"files_reused": 0, "files_parsed": 0,
+                      "functions_reused": 0, "functions_walked": 0}
+
+        if cache_path and os.path.isfile(cache_path):
+            try:
+                with open(cache_path) as infile:
+                    data = json.load(infile)
+                if data.get("version") == self.VERSION and \
+                        data.get("stoplist", "") == Stoplist.fingerprint:
+                    self.entries = data["files"]
+
+            except (OSError, ValueError, KeyError) as err:
+                LOGGER.warning("Ignoring function cache %s: %s", cache_path,
+                               err)
+
+    def extract(self, file_path: str, text: str, intr, astp) -> list:
+        """
+        Extract the string occurrences of a pre-processed file.
+
+        :param file_path: file the text was pre-processed from
+        :param text: pre-processed text of the file
+        :param intr: `Interface` whose parser is used
+        :param astp: `AstParser` whose visitors are used
+        :return occurrences: list of tuples in the format
+            (function, string, line, column)
+        """
+        digest = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+        entry = self.entries.get(file_path)
+
+        if entry and entry["digest"] == digest:
+            self.stats["files_reused"] += 1
+            return [(name, string, start + line, column)
+                    for _, name, start, strings in entry["functions"]
+                    for string, line, column in strings]
+
+        self.stats["files_parsed"] += 1
+        cached = {}
+        if entry:
+            cached = {span: strings
+                      for span, _, _, strings in entry["functions"] if span}
+
+        ast = intr.parse_text(text, file_path)
+        lines = text.splitlines(True)
+        positions = self.map_lines(lines)
+
+        try:
+            function_nodes = astp.locate_functions(ast)
+            starts = [positions.get((node.coord.file, node.coord.line))
+                      if node.coord else None for node in function_nodes]
+
+            # Spans run up to the start of whichever function follows in
+            # the text, whatever order the functions were visited in
+            bounds = sorted(start for start in starts if start is not None)
+            functions = []
+            occurrences = []
+
+            for node, start in zip(function_nodes, starts):
+                name = node.decl.name
+                first = node.coord.line if node.coord else 0
+
+                span = None
+                if start is not None:
+                    following = bisect.bisect_right(bounds, start)
+                    end = bounds[following] if following < len(bounds) \
+                        else len(lines)
+                    span = hashlib.sha256("".join(lines[start:end]).encode(
+                        "utf-8", "replace")).hexdigest()
+
+                if span in cached:
+                    self.stats["functions_reused"] += 1
+                    strings = cached[span]
+                else:
+                    self.stats["functions_walked"] += 1
+                    strings = [[string, line - first, column]
+                               for _, string, line, column
+                               in astp.function_occurrences(node)]
+
+                functions.append([span, name, first, strings])
+                occurrences.extend((name, string, first + line, column)
+                                   for string, line, column in strings)
+
+        finally:
+            # The visitors accumulate nodes across calls
+            astp.__init__()
+
+        self.entries[file_path] = {"digest": digest, "functions": functions}
+        return occurrences
+
+    @staticmethod
+    def map_lines(lines: list) -> dict:
+        """
+        Map each source line to where it ended up in the pre-processed text.
+
+        :param lines: lines of the pre-processed text
+        :return positions: dictionary of (file, line): index into `lines`
+        """
+        positions = {}
+        file_name = ""
+        line_number = 1
+
+        for index, line in enumerate(lines):
+            if line.startswith("#"):
+                marker = Interface.LINE_MARKER.match(line)
+                if marker:
+                    file_name = marker.group(2)[1:-1]
+                    line_number = int(marker.group(1))
+                    continue
+
+            positions.setdefault((file_name, line_number), index)
+            line_number += 1
+
+        return positions
+
+    def forget(self, file_path: str) -> None:
+        """
+        Drop the cached functions of a file which no longer exists.
+
+        :param file_path: removed file
+        :return: returns nothing
+        """
+        self.entries.pop(file_path, None)
+
+    def save(self) -> None:
+        """
+        Persist the cache, if it was given a path.
+
+        :return: returns nothing
+        """
+        LOGGER.info("Function cache: %s", self.stats)
+
+        if not self.cache_path:
+            return
+
+        with open(self.cache_path + ".tmp", "w") as outfile:
+            json.dump({"version": self.VERSION,
+                       "stoplist": Stoplist.fingerprint,
+                       "files": self.entries}, outfile)
+        os.replace(self.cache_path + ".tmp", self.cache_path)
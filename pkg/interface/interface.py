@@ -6,14 +6,17 @@ convention.
 """
 
 import logging
+import hashlib
 import json
 import os
-import platform
+import re
+import subprocess
+import zlib
 from abc import ABC
-from pycparser import c_ast, parse_file
 
 from verifier.verifier import Verifier
-from exception.exception import NoneFilePathError
+from exception.exception import NoneFilePathError, BundleCreationError, \
+    PreprocessError
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,12 +34,49 @@ class Interface(ABC):
     directory structure validity.
 
     `OUT_FILE_PATH` is the fully qualified path to the "bundle".
+
+    `COMPRESSION` maps the extensions of a bundle path to the compression
+    it is written with, and `MAGIC` the leading bytes of a compressed
+    bundle to the compression it is read with. Bundles are written in
+    pieces of at most `WRITE_SIZE` characters.
+
+    `FAKE_LIBC_DIR` holds the stand-in standard library headers handed to
+    the pre-processor. It is located relative to the package whenever
+    possible so that files can be loaded from any working directory.
+
+    `SHARD_DIR` is the directory in which a sharded bundle is placed, made
+    up of `MANIFEST_FILE` and one file per shard named after `SHARD_FILE`.
+
+    `LINE_MARKER` matches the line markers a pre-processor emits, of the
+    form # 1 "file.c" flags, which are used to split the output of a
+    batch of files back into one output per file.
     """
 
+    # While the requirements of the project list LLVM and associated
+    # developer packages, these are sometimes differences between
+    # clang file extensions of Windows vs. Unix
+    CLANG_PATH = "clang.exe" if os.name == "nt" else "clang"
+
     OUT_FILE = "bundle.json"
     OUT_DIR = os.getcwd() + "/out/"
     OUT_FILE_PATH = os.getcwd() + "/out/" + OUT_FILE
 
+    COMPRESSION = {".gz": "gzip", ".xz": "xz"}
+    MAGIC = {b"\x1f\x8b": "gzip", b"\xfd7zXZ\x00": "xz"}
+    WRITE_SIZE = 1 << 20
+
+    FAKE_LIBC_DIR = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "utils", "fake_libc_include")
+    if not os.path.isdir(FAKE_LIBC_DIR):
+        FAKE_LIBC_DIR = "utils/fake_libc_include"
+
+    SHARD_DIR = os.getcwd() + "/out/shards/"
+    MANIFEST_FILE = "manifest.json"
+    SHARD_FILE = "shard-{:04d}.json"
+
+    LINE_MARKER = re.compile(r'# (\d+) ("(?:[^"\\]|\\.)*")( [\d ]+)?\s*$')
+
     def __init__(self) -> None:
         """
         Initialize the `Interface` object.
@@ -52,13 +92,14 @@ class Interface(ABC):
         """
         self.ast = None
         self.json_data = None
+        self._parser = None
 
-    def load_new_ast(self, file_path: str = "") -> c_ast.FileAST:
+    def load_new_ast(self, file_path: str = "") -> "c_ast.FileAST":
         """
         Load a new abstract syntax tree (AST).
 
-        Check file path validity before selecting which type of clang
-        executable to use for PycParser's `parse_file`.
+        Check file path validity before pre-processing the file with clang
+        and parsing it with PycParser.
 
         :param file_path: file to be parsed
         :return self.ast: PycParser AST
@@ -69,13 +110,6 @@ class Interface(ABC):
         if not file_path:
             raise NoneFilePathError("File path is not fully qualified")
 
-        # While the requirements of the project list LLVM and associated
-        # developer packages, these are sometimes differences between
-        # clang file extensions of Windows vs. Unix
-        clang_path = "clang"
-        if platform.system() == "Windows":
-            clang_path = "clang.exe"
-
         # Files of any size are supported, with the limits of execution
         # falling only on available user hardware. 50 megabytes of C
         # code in one file is a good place to draw the line
@@ -83,14 +117,126 @@ class Interface(ABC):
         if size_mb > 50:
             LOGGER.warning("File size exceeds 50MB")
 
-        # PycParser offers a few different ways to generate ASTs but the
-        # following is by far the most clean. Clang is well developed
-        # as a c pre-processor and installed by default on OS X
-        self.ast = parse_file(file_path,
-                              use_cpp=True,
-                              cpp_path=clang_path,
-                              cpp_args=['-E', '-Iutils/fake_libc_include'])
+        # Clang is well developed as a c pre-processor and installed by
+        # default on OS X. Pre-processing the file here rather than through
+        # PycParser's `parse_file` fails with a `PreprocessError`, just as
+        # a batch does, instead of whatever PycParser lets through
+        return self.parse_text(self.preprocess(file_path), file_path)
+
+    def preprocess_batch(self, file_paths: list) -> dict:
+        """
+        Pre-process a batch of files with a single clang invocation.
+
+        Spawning clang once per file costs more than the pre-processing
+        itself for small files. Instead, every file of the batch is handed
+        to one invocation, and its output is split back into one output
+        per file using the line marker that starts each of them.
+
+        Should the batch fail, or its output not split cleanly, every file
+        is pre-processed on its own instead, so that any failure is
+        attributed to the file which caused it.
+
+        :param file_paths: files to be pre-processed
+        :return outputs: dictionary of file path: pre-processed text, or
+            the `PreprocessError` raised for that file
+        """
+        for file_path in file_paths:
+            if not file_path:
+                raise NoneFilePathError("File path is not fully qualified")
+
+        process = subprocess.run(
+            [self.CLANG_PATH, "-E", "-I" + self.FAKE_LIBC_DIR] + file_paths,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+
+        if process.returncode == 0:
+            outputs = self.split_preprocessed(process.stdout, file_paths)
+            if outputs is not None:
+                return outputs
+
+            LOGGER.warning("Could not split batch output, falling back to "
+                           "one pre-processor per file")
+
+        outputs = {}
+        for file_path in file_paths:
+            try:
+                outputs[file_path] = self.preprocess(file_path)
+            except PreprocessError as err:
+                outputs[file_path] = err
+
+        return outputs
+
+    def preprocess(self, file_path: str) -> str:
+        """
+        Pre-process a single file with clang.
+
+        :param file_path: file to be pre-processed
+        :return text: the pre-processed text
+        """
+        process = subprocess.run(
+            [self.CLANG_PATH, "-E", "-I" + self.FAKE_LIBC_DIR, file_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+
+        if process.returncode:
+            raise PreprocessError(file_path, process.stderr.strip())
+
+        return process.stdout
+
+    def split_preprocessed(self, text: str, file_paths: list) -> dict:
+        """
+        Split the pre-processed output of a batch into one text per file.
+
+        Each file's output starts with a line marker naming the file as it
+        was given on the command line, without any flags. Markers entering
+        or leaving an included file always carry a flag.
+
+        :param text: pre-processed output of the whole batch
+        :param file_paths: files of the batch, in command line order
+        :return outputs: dictionary of file path: pre-processed text, or
+            None if the output did not contain exactly one part per file
+        """
+        starts = [json.dumps(file_path, ensure_ascii=False)
+                  for file_path in file_paths]
+        outputs = {}
+        index = -1
+        lines = []
+
+        for line in text.splitlines(True):
+            if line.startswith("# ") and index + 1 < len(file_paths):
+                marker = self.LINE_MARKER.match(line)
+
+                if marker and not marker.group(3) and \
+                        marker.group(2) == starts[index + 1]:
+                    if index >= 0:
+                        outputs[file_paths[index]] = "".join(lines)
+
+                    index += 1
+                    lines = []
+
+            lines.append(line)
+
+        if index + 1 != len(file_paths):
+            return None
+
+        outputs[file_paths[index]] = "".join(lines)
+        return outputs
+
+    def parse_text(self, text: str, file_path: str) -> "c_ast.FileAST":
+        """
+        Parse pre-processed text into an abstract syntax tree (AST).
 
+        :param text: pre-processed text of the file
+        :param file_path: file the text was pre-processed from
+        :return self.ast: PycParser AST
+        """
+        from pycparser import c_parser
+
+        # Building a parser is expensive, a single one serves every file
+        if self._parser is None:
+            self._parser = c_parser.CParser()
+
+        self.ast = self._parser.parse(text, file_path)
         return self.ast
 
     def convert_dict_to_json(self, data: dict) -> None:
@@ -139,9 +285,342 @@ class Interface(ABC):
         # a new file if it doesn't already exist. Save the old file
         # somewhere else or under a different name if persistence
         # between program runs is important
-        with open(self.OUT_FILE_PATH, "w") as outfile:
-            outfile.write(data)
+        with self.open_bundle(self.OUT_FILE_PATH, "w") as outfile:
+
+            # Written piece by piece, a compressed bundle never needs an
+            # encoded copy of the whole string
+            for start in range(0, len(data), self.WRITE_SIZE):
+                outfile.write(data[start:start + self.WRITE_SIZE])
 
         # Perform several checks on the validity of both out/ and on
         # the bundle itself
         Verifier.check_bundle_creation(self.OUT_DIR, self.OUT_FILE_PATH)
+
+    def stream_bundle_to_disk(self, pairs) -> None:
+        """
+        Write string: function pairs to out/ without building a dictionary.
+
+        The pairs must already be ordered by string. The result is
+        byte-for-byte what `convert_dict_to_json` and `drop_bundle_to_disk`
+        produce for the equivalent dictionary, but only a single pair is
+        ever held in memory.
+
+        :param pairs: iterable of tuples in the format (string, function)
+        :return: returns nothing
+        """
+        count = 0
+
+        with self.open_bundle(self.OUT_FILE_PATH, "w") as outfile:
+            for string, func in pairs:
+
+                # Mirrors the layout of json.dumps with an indent of 4,
+                # including the stripping of double backslashes
+                line = "    " + json.dumps(string) + ": " + json.dumps(func)
+                outfile.write(("{\n" if not count else ",\n") +
+                              line.replace("\\\\", "\\"))
+                count += 1
+
+            outfile.write("\n}" if count else "{}")
+
+        if not count:
+            LOGGER.warning("Empty bundle")
+
+        Verifier.check_bundle_creation(self.OUT_DIR, self.OUT_FILE_PATH)
+
+    @classmethod
+    def set_out_file_path(cls, file_path: str) -> None:
+        """
+        Write the bundle to another path than out/bundle.json.
+
+        :param file_path: path of the bundle, compressed when it ends in
+            one of the extensions of `COMPRESSION`
+        :return: returns nothing
+        """
+        cls.OUT_FILE_PATH = os.path.abspath(file_path)
+        cls.OUT_DIR = os.path.dirname(cls.OUT_FILE_PATH) + os.sep
+
+    @classmethod
+    def open_bundle(cls, file_path: str, mode: str = "r"):
+        """
+        Open a bundle for reading or writing text, compressed or not.
+
+        The compression written is chosen by the extension of the path,
+        while the compression read is recognized by the magic bytes of the
+        file, whatever it is named. Either way, the data is compressed or
+        decompressed incrementally as it is written or read.
+
+        :param file_path: path of the bundle
+        :param mode: "r" to read or "w" to write
+        :return file: text file object
+        """
+        if mode == "w":
+            compression = cls.COMPRESSION.get(
+                os.path.splitext(file_path)[1].lower())
+        else:
+            with open(file_path, "rb") as infile:
+                head = infile.read(6)
+
+            compression = next((name for magic, name in cls.MAGIC.items()
+                                if head.startswith(magic)), None)
+
+        if not compression:
+            return open(file_path, mode)
+
+        # Neither is needed unless a bundle is actually compressed
+        import io
+
+        if compression == "gzip":
+            import gzip
+
+            # A fixed timestamp keeps identical bundles byte for byte
+            # identical, and the default level is needlessly slow
+            raw = gzip.GzipFile(file_path, mode + "b", compresslevel=6,
+                                mtime=0)
+        else:
+            import lzma
+            raw = lzma.LZMAFile(file_path, mode + "b")
+
+        return io.TextIOWrapper(raw, encoding="utf-8")
+
+    @classmethod
+    def load_bundle(cls, file_path: str = None) -> dict:
+        """
+        Load a bundle written by `drop_bundle_to_disk` or
+        `stream_bundle_to_disk`.
+
+        The stripping of double backslashes leaves a bundle which is not
+        always valid json, such as with a hex escape, so each line is
+        split into its string and function by hand. Each string is given
+        back as it was spelled in the C source, escape sequences and all.
+        Compressed bundles are read just the same.
+
+        :param file_path: bundle to load, `OUT_FILE_PATH` by default
+        :return bundle: dictionary of string: function
+        """
+        bundle = {}
+
+        with cls.open_bundle(file_path or cls.OUT_FILE_PATH) as infile:
+            for line in infile:
+                line = line.strip().rstrip(",")
+
+                # Function names never contain a quote, so the last
+                # separator on the line is always the one between the two
+                if not line.startswith('"') or '": "' not in line:
+                    continue
+
+                string, func = line[1:-1].rsplit('": "', 1)
+
+                # A quote within a string is escaped in the source, and
+                # once more by json, which the stripping turns into \"
+                bundle[string.replace('\\"', '"')] = func
+
+        return bundle
+
+    @staticmethod
+    def shard_of(string: str, num_shards: int) -> int:
+        """
+        Determine which shard a bundle string belongs to.
+
+        Python's own hash() is salted per process, so a stable checksum is
+        used instead. Writers and readers must always agree on the shard.
+
+        :param string: bundle string
+        :param num_shards: total number of shards
+        :return int: index of the shard
+        """
+        return zlib.crc32(string.encode("utf-8")) % num_shards
+
+    def drop_shards_to_disk(self, data: dict, num_shards: int,
+                            shard_dir: str = None) -> None:
+        """
+        Write a dictionary as hash-partitioned json shards plus a manifest.
+
+        Each shard is only rewritten when its contents differ from what the
+        existing manifest records, so small changes to a large bundle touch
+        only a handful of files. Changed shards are written in parallel.
+
+        Unlike the single bundle, shards hold standard json so that their
+        keys round trip exactly and can be used for point lookups.
+
+        :param data: Master `Record` dictionary of string: function
+        :param num_shards: total number of shards
+        :param shard_dir: directory to write to, `SHARD_DIR` by default
+        :return: returns nothing
+        """
+        shard_dir = shard_dir or self.SHARD_DIR
+        os.makedirs(shard_dir, exist_ok=True)
+
+        shards = [{} for _ in range(num_shards)]
+        for string, func in data.items():
+            shards[self.shard_of(string, num_shards)][string] = func
+
+        previous = self.load_manifest(shard_dir)
+        previous_files = []
+        if previous and previous["shards"] == num_shards:
+            previous_files = previous["files"]
+
+        files = []
+        changed = []
+
+        for index, shard in enumerate(shards):
+            name = self.SHARD_FILE.format(index)
+            text = json.dumps(shard, indent=4, sort_keys=True)
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+            unchanged = index < len(previous_files) and \
+                previous_files[index]["sha256"] == digest and \
+                os.path.isfile(os.path.join(shard_dir, name))
+
+            if not unchanged:
+                changed.append((os.path.join(shard_dir, name), text))
+
+            files.append({"file": name, "count": len(shard),
+                          "sha256": digest})
+
+        # Serializing holds the GIL, whereas writing and closing files
+        # releases it, so only the writes are handed out to threads
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor() as executor:
+            list(executor.map(lambda shard: self.write_shard(*shard),
+                              changed))
+
+        # Shards left over from a previous run with more shards would
+        # otherwise linger next to the new ones
+        if previous:
+            for stale in previous["files"][num_shards:]:
+                stale_path = os.path.join(shard_dir, stale["file"])
+                if os.path.isfile(stale_path):
+                    os.remove(stale_path)
+
+        manifest = {"version": 1, "hash": "crc32", "shards": num_shards,
+                    "count": len(data), "files": files}
+
+        tmp_path = os.path.join(shard_dir, self.MANIFEST_FILE + ".tmp")
+        with open(tmp_path, "w") as outfile:
+            json.dump(manifest, outfile, indent=4)
+        os.replace(tmp_path, os.path.join(shard_dir, self.MANIFEST_FILE))
+
+        Verifier.check_bundle_creation(
+            shard_dir, os.path.join(shard_dir, self.MANIFEST_FILE))
+
+        LOGGER.info("Rewrote %d of %d shards", len(changed), num_shards)
+
+    @staticmethod
+    def write_shard(shard_path: str, text: str) -> None:
+        """
+        Write a single serialized shard to disk.
+
+        :param shard_path: path of the shard
+        :param text: json of the shard
+        :return: returns nothing
+        """
+        # Writing to a temporary file first means a reader never sees a
+        # partially written shard
+        with open(shard_path + ".tmp", "w") as outfile:
+            outfile.write(text)
+        os.replace(shard_path + ".tmp", shard_path)
+
+    @classmethod
+    def load_manifest(cls, shard_dir: str = None) -> dict:
+        """
+        Load the manifest of a sharded bundle.
+
+        :param shard_dir: directory of the sharded bundle
+        :return manifest: the manifest, or None if there is none yet
+        """
+        manifest_path = os.path.join(shard_dir or cls.SHARD_DIR,
+                                     cls.MANIFEST_FILE)
+
+        if not os.path.isfile(manifest_path):
+            return None
+
+        with open(manifest_path) as infile:
+            return json.load(infile)
+
+    @classmethod
+    def load_shard(cls, string: str, shard_dir: str = None) -> dict:
+        """
+        Load the single shard which would contain a bundle string.
+
+        :param string: bundle string to look up
+        :param shard_dir: directory of the sharded bundle
+        :return shard: dictionary of string: function for that shard
+        """
+        shard_dir = shard_dir or cls.SHARD_DIR
+        manifest = cls.load_manifest(shard_dir)
+
+        if not manifest:
+            raise BundleCreationError("No sharded bundle in " + shard_dir)
+
+        entry = manifest["files"][cls.shard_of(string, manifest["shards"])]
+        with open(os.path.join(shard_dir, entry["file"])) as infile:
+            return json.load(infile)
+
+    @classmethod
+    def lookup(cls, string: str, shard_dir: str = None) -> str:
+        """
+        Look up the function of a single string in a sharded bundle.
+
+        :param string: bundle string to look up
+        :param shard_dir: directory of the sharded bundle
+        :return func: function name, or None if the string is not unique
+        """
+        return cls.load_shard(string, shard_dir).get(string)
+
+
+class EventWriter(ABC):
+    """
+    Define the object responsible for streaming occurrence events to disk.
+
+    Every occurrence of a string within a function is written as a single
+    line of json (NDJSON), as soon as the file it was found in has been
+    processed. Downstream jobs can compute their own aggregations from the
+    stream without the corpus having to be parsed again.
+
+    `BUFFER_SIZE` is the number of bytes buffered before each write, so
+    the cost of writing is amortized over many occurrences.
+    """
+
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, file_path: str) -> None:
+        """
+        Initialize the `EventWriter` object and open its output file.
+
+        `self.count` holds the number of occurrences written so far.
+
+        :param file_path: path of the NDJSON file to write
+        :return: returns nothing
+        """
+        self.file_path = file_path
+        self.count = 0
+        self._outfile = open(file_path, "w", buffering=self.BUFFER_SIZE,
+                             encoding="utf-8")
+
+    def write_occurrences(self, file_path: str, occurrences: list) -> None:
+        """
+        Write one event per occurrence found in a file.
+
+        :param file_path: file the occurrences were found in
+        :param occurrences: list of tuples in the format
+            (function, string, line, column)
+        :return: returns nothing
+        """
+        self._outfile.writelines(
+            json.dumps({"file": file_path, "function": func,
+                        "string": string, "line": line, "column": column},
+                       ensure_ascii=False) + "\n"
+            for func, string, line, column in occurrences)
+
+        self.count += len(occurrences)
+
+    def close(self) -> None:
+        """
+        Flush any buffered events and close the output file.
+
+        :return: returns nothing
+        """
+        self._outfile.close()
+
+        LOGGER.info("Wrote %d events to %s", self.count, self.file_path)
@@ -0,0 +1,300 @@
+"""
+Defines `KeyIndex`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import array
+import bisect
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class KeyIndex(ABC):
+    """
+    Define the object responsible for prefix and substring lookups.
+
+    IDA rarely shows a string exactly as the literal in the bundle, as it
+    may cut it short or split it in two. The index answers which bundle
+    strings start with, or contain, a probe, with a couple of binary
+    searches over a memory-mapped file instead of a scan of every string.
+
+    The index file starts with `HEADER`, followed by six arrays, each
+    aligned to 8 bytes:
+
+    - the bundle strings, each followed by a NUL byte
+    - their functions, each followed by a NUL byte
+    - the offset of each string, and one past the last
+    - the offset of each function, and one past the last
+    - the offset of each string, ordered by string
+    - the offset of each suffix of each string, ordered by suffix, which
+      is the suffix array
+
+    Strings are indexed as spelled in the bundle, escape sequences and
+    all, and compared as UTF-8 bytes. Offsets are 32-bit unsigned integers
+    in the byte order named in the header, which must be that of the host.
+    """
+
+    MAGIC = b"IDACFPIX"
+    VERSION = 1
+    HEADER = struct.Struct("<8sII4Q")
+    BYTE_ORDERS = {"little": 1, "big": 2}
+
+    def __init__(self, index_path: str) -> None:
+        """
+        Initialize the `KeyIndex` object by memory-mapping an index.
+
+        :param index_path: index written by `build`
+        :return: returns nothing
+        """
+        self.index_path = index_path
+
+        with open(index_path, "rb") as infile:
+            self._map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byte_order, count, text_size, func_size, \
+            suffix_count = self.HEADER.unpack_from(self._map)
+
+        if magic != self.MAGIC or version != self.VERSION:
+            self._map.close()
+            raise ValueError("Not an index of this version: " + index_path)
+
+        if byte_order != self.BYTE_ORDERS[sys.byteorder]:
+            self._map.close()
+            raise ValueError("Index written with another byte order: " +
+                             index_path)
+
+        self.count = count
+        self._text_start = self.HEADER.size
+        self._view = view = memoryview(self._map)
+        position = self.HEADER.size
+
+        def section(size: int, cast: bool = True):
+            nonlocal position
+            start = position
+            position += self.padded(size * (4 if cast else 1))
+            part = view[start:start + size * (4 if cast else 1)]
+            return part.cast("I") if cast else part
+
+        self.text = section(text_size, False)
+        self.funcs = section(func_size, False)
+        self.starts = section(count + 1)
+        self.func_starts = section(count + 1)
+        self.prefixes = section(count)
+        self.suffixes = section(suffix_count)
+
+    def close(self) -> None:
+        """
+        Release the memory-mapped index.
+
+        :return: returns nothing
+        """
+        for name in ("text", "funcs", "starts", "func_starts", "prefixes",
+                     "suffixes"):
+            getattr(self, name).release()
+
+        self._view.release()
+        self._map.close()
+
+    @staticmethod
+    def padded(size: int) -> int:
+        """
+        Round a section size up to its 8 byte alignment.
+
+        :param size: bytes of the section
+        :return int: bytes the section takes up in the file
+        """
+        return (size + 7) & ~7
+
+    @staticmethod
+    def path_for(bundle_path: str) -> str:
+        """
+        Name the index kept next to a bundle.
+
+        :param bundle_path: path of the bundle, compressed or not
+        :return str: path of the index, such as out/bundle.idx
+        """
+        root, extension = os.path.splitext(bundle_path)
+        if extension in (".gz", ".xz"):
+            root = os.path.splitext(root)[0]
+
+        return root + ".idx"
+
+    @classmethod
+    def build(cls, bundle: dict, index_path: str) -> int:
+        """
+        Build the index of a bundle and write it to disk.
+
+        Suffixes are sorted one bucket per leading byte at a time, so only
+        the suffixes of a single bucket are ever held as bytes at once.
+
+        :param bundle: dictionary of string: function, as `load_bundle`
+            gives it
+        :param index_path: path of the index to write
+        :return count: number of suffixes indexed
+        """
+        start = time.perf_counter()
+        strings = [string.encode("utf-8", "surrogatepass")
+                   for string in bundle]
+        funcs = [func.encode("utf-8") for func in bundle.values()]
+
+        text = b"\0".join(strings) + b"\0"
+        func_text = b"\0".join(funcs) + b"\0"
+        if len(text) > 0xFFFFFFFF or len(func_text) > 0xFFFFFFFF:
+            raise ValueError("Bundle too large for 32-bit offsets")
+
+        starts = array.array("I", [0])
+        for string in strings:
+            starts.append(starts[-1] + len(string) + 1)
+
+        func_starts = array.array("I", [0])
+        for func in funcs:
+            func_starts.append(func_starts[-1] + len(func) + 1)
+
+        prefixes = array.array("I", sorted(
+            starts[:-1], key=lambda offset: text[offset:text.index(
+                b"\0", offset)]))
+
+        buckets = [array.array("I") for _ in range(256)]
+        for string, offset in zip(strings, starts):
+            for position, byte in enumerate(string, offset):
+                buckets[byte].append(position)
+
+        suffixes = array.array("I")
+        for bucket in buckets:
+            suffixes.extend(sorted(bucket, key=lambda offset: text[
+                offset:text.index(b"\0", offset)]))
+        del buckets
+
+        sections = [text, func_text, starts, func_starts, prefixes, suffixes]
+
+        # Written whole to a temporary file first, so that a reader never
+        # maps half an index
+        with open(index_path + ".tmp", "wb") as outfile:
+            outfile.write(cls.HEADER.pack(
+                cls.MAGIC, cls.VERSION, cls.BYTE_ORDERS[sys.byteorder],
+                len(strings), len(text), len(func_text), len(suffixes)))
+
+            for part in sections:
+                data = part if isinstance(part, bytes) else part.tobytes()
+                outfile.write(data)
+                outfile.write(b"\0" * (cls.padded(len(data)) - len(data)))
+
+        os.replace(index_path + ".tmp", index_path)
+
+        LOGGER.info("Indexed %d suffixes of %d strings in %.2f s",
+                    len(suffixes), len(strings), time.perf_counter() - start)
+
+        return len(suffixes)
+
+    def string(self, number: int) -> str:
+        """
+        Look up a string of the index.
+
+        :param number: position of the string in the bundle
+        :return str: the string as spelled in the bundle
+        """
+        return bytes(self.text[self.starts[number]:
+                               self.starts[number + 1] - 1]).decode(
+                                   "utf-8", "surrogatepass")
+
+    def function(self, number: int) -> str:
+        """
+        Look up the function of a string of the index.
+
+        :param number: position of the string in the bundle
+        :return str: name of the function
+        """
+        return bytes(self.funcs[self.func_starts[number]:
+                                self.func_starts[number + 1] - 1]).decode(
+                                    "utf-8")
+
+    def search(self, offsets, probe: bytes) -> tuple:
+        """
+        Find the run of sorted offsets at which the text starts with a
+        probe.
+
+        :param offsets: offsets into the text, ordered by what follows
+        :param probe: bytes to look for
+        :return tuple: first position of the run and one past its last
+        """
+        # Slices of the map itself are bytes, which unlike memory views
+        # can be ordered
+        text = self._map
+        base = self._text_start
+        width = len(probe)
+
+        low, high = 0, len(offsets)
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + offsets[middle]
+            if text[offset:offset + width] < probe:
+                low = middle + 1
+            else:
+                high = middle
+
+        first, high = low, len(offsets)
+        while low < high:
+            middle = (low + high) // 2
+            offset = base + offsets[middle]
+            if text[offset:offset + width] == probe:
+                low = middle + 1
+            else:
+                high = middle
+
+        return first, low
+
+    def lookup(self, offsets, probe: str, limit: int = None) -> list:
+        """
+        Collect the strings at the run of offsets matching a probe.
+
+        :param offsets: offsets into the text, ordered by what follows
+        :param probe: string to look for
+        :param limit: most strings returned, unlimited if None
+        :return pairs: list of tuples in the format (string, function)
+        """
+        first, last = self.search(offsets,
+                                  probe.encode("utf-8", "surrogatepass"))
+        numbers = []
+        seen = set()
+
+        for position in range(first, last):
+            if limit is not None and len(numbers) >= limit:
+                break
+
+            # A string can contain the probe more than once
+            number = bisect.bisect_right(self.starts, offsets[position]) - 1
+            if number not in seen:
+                seen.add(number)
+                numbers.append(number)
+
+        return [(self.string(number), self.function(number))
+                for number in numbers]
+
+    def prefix(self, probe: str, limit: int = None) -> list:
+        """
+        Find the strings which start with a probe, in order.
+
+        :param probe: start of the strings, as spelled in the bundle
+        :param limit: most strings returned, unlimited if None
+        :return pairs: list of tuples in the format (string, function)
+        """
+        return self.lookup(self.prefixes, probe, limit)
+
+    def substring(self, probe: str, limit: int = None) -> list:
+        """
+        Find the strings which contain a probe anywhere.
+
+        :param probe: part of the strings, as spelled in the bundle
+        :param limit: most strings returned, unlimited if None
+        :return pairs: list of tuples in the format (string, function)
+        """
+        return self.lookup(self.suffixes, probe, limit)
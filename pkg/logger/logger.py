@@ -0,0 +1,133 @@
+"""
+Defines `Logger`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import queue
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Logger(ABC):
+    """
+    Define the object responsible for routing log records off the hot path.
+
+    Every record emitted anywhere in the project is placed on a queue by a
+    `QueueHandler` attached to the root logger. A `QueueListener` running
+    on its own thread drains that queue and performs the (comparatively
+    slow) formatting and writing to stderr and, optionally, a rotating
+    log file.
+
+    `FORMAT` matches the format `logging.basicConfig` has always produced,
+    so verbose output looks the same as it did before records were queued.
+
+    `MAX_BYTES` and `BACKUP_COUNT` bound the size of the optional log file
+    and the number of rotated copies kept alongside it.
+    """
+
+    FORMAT = "%(levelname)s:%(name)s:%(message)s"
+    FILE_FORMAT = "%(asctime)s %(processName)s " + FORMAT
+    MAX_BYTES = 10 << 20
+    BACKUP_COUNT = 5
+
+    # Both are None until `start` is called, and again after `stop`
+    queue = None
+    listener = None
+
+    @classmethod
+    def start(cls, level: int = logging.WARNING, log_file: str = None,
+              multiprocess: bool = False) -> None:
+        """
+        Start the writer thread and attach the queue to the root logger.
+
+        A plain `SimpleQueue` is used unless records will also arrive from
+        worker processes, in which case a `multiprocessing.Queue` is needed
+        so that it can be handed to each worker through `worker_init`.
+
+        :param level: level of the root logger
+        :param log_file: optional path of a rotating log file
+        :param multiprocess: whether worker processes will share the queue
+        :return: returns nothing
+        """
+        # The handlers module pulls in sockets and pickling, which a run
+        # without any logging configured never needs
+        import logging.handlers
+
+        if cls.listener:
+            cls.stop()
+
+        if multiprocess:
+            # Only imported when workers are in play, it is slow to import
+            import multiprocessing
+
+            cls.queue = multiprocessing.Queue(-1)
+        else:
+            cls.queue = queue.SimpleQueue()
+
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(cls.FORMAT))
+        handlers = [stream]
+
+        if log_file:
+            rotating = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=cls.MAX_BYTES,
+                backupCount=cls.BACKUP_COUNT)
+            rotating.setFormatter(logging.Formatter(cls.FILE_FORMAT))
+            handlers.append(rotating)
+
+        cls.listener = logging.handlers.QueueListener(
+            cls.queue, *handlers, respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.handlers = [logging.handlers.QueueHandler(cls.queue)]
+        root.setLevel(level)
+
+        cls.listener.start()
+
+    @classmethod
+    def stop(cls) -> None:
+        """
+        Flush every queued record and stop the writer thread.
+
+        :return: returns nothing
+        """
+        if not cls.listener:
+            return
+
+        # Stopping the listener enqueues a sentinel and joins the thread,
+        # which guarantees every record queued before now is written
+        cls.listener.stop()
+
+        for handler in cls.listener.handlers:
+            handler.close()
+
+        logging.getLogger().handlers = []
+        cls.listener = None
+        cls.queue = None
+
+    @staticmethod
+    def worker_init(log_queue, level: int) -> None:
+        """
+        Forward every record of a worker process to the parent's queue.
+
+        Intended to be run first thing inside each worker process. The
+        worker never formats or writes a record itself; everything is
+        handled by the parent's writer thread.
+
+        :param log_queue: the `multiprocessing.Queue` of the parent
+        :param level: level of the worker's root logger
+        :return: returns nothing
+        """
+        import logging.handlers
+
+        root = logging.getLogger()
+        root.setLevel(level)
+
+        # Without a shared queue the parent is not collecting records, so
+        # the worker keeps the default behaviour of the logging module
+        if log_queue is not None:
+            root.handlers = [logging.handlers.QueueHandler(log_queue)]
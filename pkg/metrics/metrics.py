@@ -0,0 +1,255 @@
+"""
+Defines `Metrics`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import bisect
+import json
+import logging
+import os
+import sys
+import time
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Metrics(ABC):
+    """
+    Define the object responsible for the metrics a run leaves behind.
+
+    Much like `Record`, `Metrics` keeps its state at class level so that
+    any module can count or time something without an instance being
+    passed around. Until `enable` is called every method returns at once,
+    so a run without `--metrics-file` pays nothing for it.
+
+    Metrics are written both as json and in the Prometheus text exposition
+    format, the latter being picked up by the textfile collector of a
+    node exporter. No network service is involved.
+
+    `DESCRIPTIONS` holds the Prometheus type and help text of every metric
+    and `BUCKETS` the upper bounds, in seconds, of the stage histograms.
+    """
+
+    PREFIX = "ida_cfp_"
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+    DESCRIPTIONS = {
+        "files_processed_total": ("counter", "Files processed"),
+        "files_failed_total": ("counter", "Files which failed for good"),
+        "files_skipped_total": ("counter", "Files skipped by the prescan"),
+        "occurrences_total": ("counter", "String occurrences extracted"),
+        "strings_stoplisted_total": ("counter", "String occurrences "
+                                                "dropped by the stoplist"),
+        "unique_strings": ("gauge", "Unique strings kept in the bundle"),
+        "tombstoned_strings": ("gauge", "Strings dropped for occurring "
+                                        "more than once"),
+        "peak_rss_bytes": ("gauge", "Peak resident set size"),
+        "children_peak_rss_bytes": ("gauge", "Peak resident set size of "
+                                             "the largest child process"),
+        "cpu_user_seconds_total": ("counter", "User CPU time"),
+        "cpu_system_seconds_total": ("counter", "System CPU time"),
+        "children_cpu_user_seconds_total": ("counter", "User CPU time of "
+                                                       "child processes"),
+        "children_cpu_system_seconds_total": ("counter", "System CPU time "
+                                                         "of child processes"),
+        "run_duration_seconds": ("gauge", "Wall time of the run"),
+        "last_run_timestamp_seconds": ("gauge", "Time the run finished"),
+        "stage_seconds": ("histogram", "Time spent in each stage, per file "
+                                           "or per export"),
+    }
+
+    enabled = False
+    started = None
+    values = {}
+    stages = {}
+
+    @classmethod
+    def enable(cls) -> None:
+        """
+        Start collecting metrics, and the clock of the run.
+
+        :return: returns nothing
+        """
+        cls.enabled = True
+        cls.started = time.monotonic()
+        cls.values = {}
+        cls.stages = {}
+
+    @classmethod
+    def count(cls, name: str, value: float = 1) -> None:
+        """
+        Add to a counter.
+
+        :param name: name of the counter
+        :param value: amount added
+        :return: returns nothing
+        """
+        if cls.enabled:
+            cls.values[name] = cls.values.get(name, 0) + value
+
+    @classmethod
+    def set(cls, name: str, value: float) -> None:
+        """
+        Set a gauge.
+
+        :param name: name of the gauge
+        :param value: new value
+        :return: returns nothing
+        """
+        if cls.enabled:
+            cls.values[name] = value
+
+    @classmethod
+    def observe(cls, stage: str, seconds: float) -> None:
+        """
+        Add the time a stage took for one file to its histogram.
+
+        Each histogram is a list of the number of observations per bucket,
+        followed by the sum of all observations.
+
+        :param stage: name of the stage, such as parse or extract
+        :param seconds: time the stage took
+        :return: returns nothing
+        """
+        if not cls.enabled:
+            return
+
+        histogram = cls.stages.get(stage)
+        if histogram is None:
+            histogram = cls.stages[stage] = [0] * (len(cls.BUCKETS) + 2)
+
+        histogram[bisect.bisect_left(cls.BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+    @classmethod
+    def counted(cls, name: str, items):
+        """
+        Pass items through while setting a gauge to how many there were.
+
+        :param name: name of the gauge
+        :param items: iterable of anything
+        :return: generator of the same items
+        """
+        total = 0
+        for item in items:
+            total += 1
+            yield item
+
+        cls.set(name, total)
+
+    @classmethod
+    def collect_process(cls) -> None:
+        """
+        Set the gauges describing the resources used by the run.
+
+        Resource usage is only available on Unix. Elsewhere, only the wall
+        time of the run is known.
+
+        :return: returns nothing
+        """
+        cls.set("run_duration_seconds", time.monotonic() - cls.started)
+        cls.set("last_run_timestamp_seconds", time.time())
+
+        try:
+            import resource
+        except ImportError:
+            return
+
+        # Linux reports the peak resident set size in kilobytes, macOS in
+        # bytes
+        scale = 1 if sys.platform == "darwin" else 1024
+
+        for prefix, who in (("", resource.RUSAGE_SELF),
+                            ("children_", resource.RUSAGE_CHILDREN)):
+            usage = resource.getrusage(who)
+            cls.set(prefix + "peak_rss_bytes", usage.ru_maxrss * scale)
+            cls.set(prefix + "cpu_user_seconds_total", usage.ru_utime)
+            cls.set(prefix + "cpu_system_seconds_total", usage.ru_stime)
+
+    @classmethod
+    def to_dict(cls) -> dict:
+        """
+        Gather every metric into a json-serializable dictionary.
+
+        Histogram buckets are cumulative, as they are in Prometheus.
+
+        :return dict: metrics of the run
+        """
+        stages = {}
+        for stage, histogram in sorted(cls.stages.items()):
+            cumulative = 0
+            buckets = {}
+            for bound, observed in zip(cls.BUCKETS + ("+Inf",),
+                                       histogram[:-1]):
+                cumulative += observed
+                buckets[str(bound)] = cumulative
+
+            stages[stage] = {"buckets": buckets, "count": cumulative,
+                             "sum": histogram[-1]}
+
+        return {"metrics": dict(sorted(cls.values.items())),
+                "stage_seconds": stages}
+
+    @classmethod
+    def to_prometheus(cls, data: dict) -> str:
+        """
+        Render gathered metrics in the Prometheus text exposition format.
+
+        :param data: metrics as returned by `to_dict`
+        :return str: text exposition of the metrics
+        """
+        lines = []
+
+        def describe(name):
+            kind, text = cls.DESCRIPTIONS.get(name, ("untyped", name))
+            lines.append("# HELP {}{} {}".format(cls.PREFIX, name, text))
+            lines.append("# TYPE {}{} {}".format(cls.PREFIX, name, kind))
+
+        for name, value in data["metrics"].items():
+            describe(name)
+            lines.append("{}{} {}".format(cls.PREFIX, name, repr(value)))
+
+        if data["stage_seconds"]:
+            describe("stage_seconds")
+            metric = cls.PREFIX + "stage_seconds"
+
+            for stage, histogram in data["stage_seconds"].items():
+                for bound, cumulative in histogram["buckets"].items():
+                    lines.append('{}_bucket{{stage="{}",le="{}"}} {}'.format(
+                        metric, stage, bound, cumulative))
+                lines.append('{}_sum{{stage="{}"}} {}'.format(
+                    metric, stage, repr(histogram["sum"])))
+                lines.append('{}_count{{stage="{}"}} {}'.format(
+                    metric, stage, histogram["count"]))
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def write(cls, base_path: str) -> None:
+        """
+        Write the metrics of the run as json and in Prometheus format.
+
+        `base_path` gets a .json and a .prom extension, an extension of
+        either kind given already being replaced. Both files are replaced
+        atomically, as a collector may read them at any moment.
+
+        :param base_path: path of the metrics files without extension
+        :return: returns nothing
+        """
+        root, extension = os.path.splitext(base_path)
+        if extension not in (".json", ".prom"):
+            root = base_path
+
+        cls.collect_process()
+        data = cls.to_dict()
+
+        for path, text in ((root + ".json", json.dumps(data, indent=4)),
+                           (root + ".prom", cls.to_prometheus(data))):
+            with open(path + ".tmp", "w") as outfile:
+                outfile.write(text)
+            os.replace(path + ".tmp", path)
+
+        LOGGER.info("Wrote metrics to %s.json and %s.prom", root, root)
@@ -0,0 +1,121 @@
+"""
+Defines `Partial`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import operator
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Partial(ABC):
+    """
+    Define the object responsible for mergeable partial results.
+
+    A bundle alone cannot be combined with another bundle, as a string that
+    is unique on two machines is not unique across both. A partial result
+    instead holds, for every string, how often it occurred and, if exactly
+    once, the function it occurred in.
+
+    Partials are written ordered by string, one json array per line in the
+    format [string, count, function], where function is null unless the
+    count is 1. Merging partials is associative: any number of them can be
+    merged in a single streaming pass, and the result of a merge is itself
+    a valid partial.
+    """
+
+    @staticmethod
+    def write(file_path: str, summaries) -> int:
+        """
+        Write string summaries, already ordered by string, to a partial.
+
+        :param file_path: path of the partial to write
+        :param summaries: iterable of tuples in the format
+            (string, count, function)
+        :return count: number of strings written
+        """
+        count = 0
+
+        with open(file_path, "w", encoding="utf-8") as outfile:
+            for summary in summaries:
+                outfile.write(json.dumps(summary, ensure_ascii=False) + "\n")
+                count += 1
+
+        LOGGER.info("Wrote %d strings to %s", count, file_path)
+        return count
+
+    @staticmethod
+    def read(file_path: str):
+        """
+        Iterate the string summaries of a partial.
+
+        :param file_path: path of a partial
+        :return: generator of tuples in the format (string, count, function)
+        """
+        with open(file_path, encoding="utf-8") as infile:
+            for line in infile:
+                yield tuple(json.loads(line))
+
+    @staticmethod
+    def summarize(sorted_pairs):
+        """
+        Summarize string: function pairs which are ordered by string.
+
+        :param sorted_pairs: iterable of tuples in the format
+            (string, function), ordered by string
+        :return: generator of tuples in the format (string, count, function)
+        """
+        for string, group in itertools.groupby(sorted_pairs,
+                                               operator.itemgetter(0)):
+            _, func = next(group)
+            count = 1 + sum(1 for _ in group)
+
+            yield string, count, func if count == 1 else None
+
+    @classmethod
+    def merge(cls, file_paths: list):
+        """
+        Merge any number of partials in a single streaming pass.
+
+        Each partial is already ordered by string, so a k-way merge brings
+        every summary of a string together while only holding one line of
+        each partial in memory.
+
+        :param file_paths: paths of the partials to merge
+        :return: generator of tuples in the format (string, count, function)
+        """
+        merged = heapq.merge(*[cls.read(file_path)
+                               for file_path in file_paths],
+                             key=operator.itemgetter(0))
+
+        for string, group in itertools.groupby(merged,
+                                               operator.itemgetter(0)):
+            count = 0
+            owner = None
+
+            for _, part_count, func in group:
+                count += part_count
+                owner = func
+
+            # The owner is only meaningful while a single occurrence exists
+            yield string, count, owner if count == 1 else None
+
+    @staticmethod
+    def unique_pairs(summaries):
+        """
+        Reduce string summaries to the unique string: function pairs.
+
+        :param summaries: iterable of tuples in the format
+            (string, count, function)
+        :return: generator of tuples in the format (string, function)
+        """
+        for string, count, func in summaries:
+            if count == 1:
+                yield string, func
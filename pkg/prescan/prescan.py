@@ -0,0 +1,171 @@
+"""
+Defines `Prescan`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import mmap
+import os
+import re
+from abc import ABC
+
+from interface.interface import Interface
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Prescan(ABC):
+    """
+    Define the object responsible for skipping files without strings.
+
+    Before any pre-processor is spawned, each file and the local headers
+    it includes are memory-mapped and scanned for anything which could
+    yield a string literal: a double quote outside of comments, character
+    constants and include directives, a stray `#` which could stringify a
+    macro argument, or one of the predefined macros expanding to a string.
+    A file without any of those cannot contain a string literal, and is
+    skipped.
+
+    The scan errs on the side of keeping a file: an include which cannot
+    be resolved, or an include cycle, counts as a possible string. System
+    headers, included with angle brackets, are not scanned.
+
+    Note that the PycParser frontend keeps every non-integer constant, such
+    as character constants and floats, and not only string literals. The
+    prescan is therefore opt-in, as a skipped file may have contributed
+    those.
+
+    `cache` holds the result of every file scanned so far, as many files
+    share the same local headers.
+    """
+
+    TOKEN = re.compile(
+        rb"/\*.*?\*/"
+        rb"|//[^\n]*"
+        rb"|'(?:[^'\\\n]|\\.)*'"
+        rb"|^[ \t]*#[ \t]*include(?:_next)?[ \t]*"
+        rb"(?:\"(?P<local>[^\"\n]*)\"|(?P<system><)|(?P<other>))"
+        rb"|^[ \t]*#"
+        rb"|(?P<string>[\"#]|"
+        rb"__(?:FILE|BASE_FILE|FILE_NAME|DATE|TIME|TIMESTAMP)__)",
+        re.DOTALL | re.MULTILINE)
+
+    cache = {}
+
+    @classmethod
+    def split(cls, file_paths: list) -> tuple:
+        """
+        Split files into those which may contain strings and those which
+        cannot.
+
+        :param file_paths: files to be scanned
+        :return tuple: list of files to keep and list of files to skip
+        """
+        kept = []
+        skipped = []
+
+        for file_path in file_paths:
+            if cls.has_strings(file_path):
+                kept.append(file_path)
+            else:
+                skipped.append(file_path)
+
+        return kept, skipped
+
+    @classmethod
+    def has_strings(cls, file_path: str, visiting: set = None) -> bool:
+        """
+        Check whether a file, or a local header it includes, may contain a
+        string literal.
+
+        :param file_path: file to be scanned
+        :param visiting: files whose includes are being scanned
+        :return bool: False only if the file cannot contain a string
+        """
+        file_path = os.path.abspath(file_path)
+
+        if file_path in cls.cache:
+            return cls.cache[file_path]
+
+        visiting = visiting or set()
+
+        # A header including itself, however indirectly, is not worth
+        # the trouble of working out
+        if file_path in visiting:
+            return True
+
+        visiting.add(file_path)
+        cls.cache[file_path] = cls.scan(file_path, visiting)
+        visiting.discard(file_path)
+
+        return cls.cache[file_path]
+
+    @classmethod
+    def scan(cls, file_path: str, visiting: set) -> bool:
+        """
+        Scan the bytes of a single file, following its local includes.
+
+        :param file_path: absolute path of the file
+        :param visiting: files whose includes are being scanned
+        :return bool: False only if the file cannot contain a string
+        """
+        try:
+            with open(file_path, "rb") as infile:
+                if not os.fstat(infile.fileno()).st_size:
+                    return False
+
+                with mmap.mmap(infile.fileno(), 0,
+                               access=mmap.ACCESS_READ) as data:
+                    return cls.scan_bytes(data, os.path.dirname(file_path),
+                                          visiting)
+
+        except OSError as err:
+            LOGGER.warning("Prescan could not read %s: %s", file_path, err)
+            return True
+
+    @classmethod
+    def scan_bytes(cls, data, directory: str, visiting: set) -> bool:
+        """
+        Scan bytes for anything which could yield a string literal.
+
+        :param data: bytes-like contents of a file
+        :param directory: directory local includes are relative to
+        :param visiting: files whose includes are being scanned
+        :return bool: False only if the contents cannot contain a string
+        """
+        for match in cls.TOKEN.finditer(data):
+            if match.group("string") is not None:
+                return True
+
+            if match.group("other") is not None:
+                # An include of a macro could be anything at all
+                return True
+
+            local = match.group("local")
+            if local is None:
+                continue
+
+            header = cls.resolve(local.decode("utf-8", "replace"),
+                                 directory)
+            if not header or cls.has_strings(header, visiting):
+                return True
+
+        return False
+
+    @staticmethod
+    def resolve(header: str, directory: str) -> str:
+        """
+        Locate a local header the way the pre-processor would.
+
+        :param header: name as written in the include directive
+        :param directory: directory of the including file
+        :return str: path of the header, or an empty string if not found
+        """
+        for include_dir in (directory, Interface.FAKE_LIBC_DIR):
+            candidate = os.path.join(include_dir, header)
+            if os.path.isfile(candidate):
+                return candidate
+
+        return ""
@@ -0,0 +1,203 @@
+"""
+Defines `Progress`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Progress(ABC):
+    """
+    Define the object responsible for reporting the progress of a run.
+
+    `Core` only tells `Progress` when a file is begun and when it has
+    ended, which costs next to nothing. The display itself is rendered by
+    a background thread at a fixed interval, so it keeps ticking even
+    while a single slow file holds up the processing thread, which is
+    exactly when it is needed most.
+
+    On a terminal, the status line is rewritten in place. Anywhere else,
+    such as a CI log, a plain line is appended at a longer interval.
+
+    `MODES` are the values accepted by `--progress`, where "auto" picks
+    "tty" or "plain" depending on whether stderr is a terminal.
+    """
+
+    MODES = ("auto", "tty", "plain", "off")
+    TTY_INTERVAL = 0.25
+    PLAIN_INTERVAL = 10.0
+
+    def __init__(self, file_paths: list, mode: str = "auto",
+                 stream=None) -> None:
+        """
+        Initialize the `Progress` object.
+
+        :param file_paths: every file the run will process
+        :param mode: one of `MODES`
+        :param stream: stream the display is written to, stderr by default
+        :return: returns nothing
+        """
+        self.stream = stream or sys.stderr
+        if mode == "auto":
+            mode = "tty" if self.stream.isatty() else "plain"
+        self.mode = mode
+
+        self.sizes = {}
+        for file_path in file_paths:
+            try:
+                self.sizes[file_path] = os.path.getsize(file_path)
+            except OSError:
+                self.sizes[file_path] = 0
+
+        self.total_files = len(file_paths)
+        self.total_bytes = sum(self.sizes.values())
+        self.done_files = 0
+        self.done_bytes = 0
+        self.in_flight = {}
+        self.started = None
+
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """
+        Start the clock and the thread rendering the display.
+
+        :return: returns nothing
+        """
+        self.started = time.monotonic()
+
+        if self.mode == "off":
+            return
+
+        self._thread = threading.Thread(target=self.render_loop,
+                                        name="progress", daemon=True)
+        self._thread.start()
+
+    def begin(self, file_path: str) -> None:
+        """
+        Mark a file as in progress.
+
+        :param file_path: file which is begun
+        :return: returns nothing
+        """
+        with self._lock:
+            self.in_flight[file_path] = time.monotonic()
+
+    def end(self, file_path: str) -> None:
+        """
+        Mark a file as done, whether it succeeded or not.
+
+        :param file_path: file which has ended
+        :return: returns nothing
+        """
+        with self._lock:
+            self.in_flight.pop(file_path, None)
+            self.done_files += 1
+            self.done_bytes += self.sizes.get(file_path, 0)
+
+    def close(self) -> None:
+        """
+        Stop the rendering thread and render the final state once more.
+
+        :return: returns nothing
+        """
+        if not self._thread:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+        self.write(self.status_line())
+        if self.mode == "tty":
+            self.stream.write("\n")
+            self.stream.flush()
+
+    def render_loop(self) -> None:
+        """
+        Render the display at a fixed interval until stopped.
+
+        :return: returns nothing
+        """
+        interval = (Progress.TTY_INTERVAL if self.mode == "tty"
+                    else Progress.PLAIN_INTERVAL)
+
+        while not self._stopped.wait(interval):
+            self.write(self.status_line())
+
+    def write(self, line: str) -> None:
+        """
+        Write a status line in the manner of the display mode.
+
+        :param line: status line
+        :return: returns nothing
+        """
+        if self.mode == "tty":
+            # Return to the start of the line and clear what was there
+            self.stream.write("\r" + line + "\x1b[K")
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def status_line(self) -> str:
+        """
+        Describe the current state of the run in a single line.
+
+        :return line: files done, throughput, ETA and the slowest file
+        """
+        now = time.monotonic()
+        elapsed = max(now - self.started, 1e-9)
+
+        with self._lock:
+            done_files = self.done_files
+            done_bytes = self.done_bytes
+            slowest = min(self.in_flight.items(), key=lambda item: item[1],
+                          default=None)
+
+        files_rate = done_files / elapsed
+        bytes_rate = done_bytes / elapsed
+
+        # Files vary wildly in size, so the estimate goes by bytes where
+        # it can and only falls back on files for empty ones
+        if bytes_rate:
+            eta = (self.total_bytes - done_bytes) / bytes_rate
+        elif files_rate:
+            eta = (self.total_files - done_files) / files_rate
+        else:
+            eta = None
+
+        line = "{}/{} files  {:.2f} MB/s  {:.1f} files/s  ETA {}".format(
+            done_files, self.total_files, bytes_rate / (1 << 20), files_rate,
+            Progress.format_seconds(eta))
+
+        if slowest:
+            line += "  slowest: {} ({:.1f}s)".format(
+                os.path.basename(slowest[0]), now - slowest[1])
+
+        return line
+
+    @staticmethod
+    def format_seconds(seconds: float) -> str:
+        """
+        Format a duration as H:MM:SS.
+
+        :param seconds: duration, None if unknown
+        :return text: formatted duration, or "?" if unknown
+        """
+        if seconds is None:
+            return "?"
+
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return "{}:{:02d}:{:02d}".format(hours, minutes, seconds)
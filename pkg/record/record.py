@@ -5,11 +5,16 @@ Instantiates the module-level logger with the appropriate naming
 convention.
 """
 
+import heapq
+import itertools
+import json
 import logging
 import operator
+import os
 from abc import ABC
 
 from verifier.verifier import Verifier
+from metrics.metrics import Metrics
 from exception.exception import NoUniqueStringsError
 
 LOGGER = logging.getLogger(__name__)
@@ -53,6 +58,45 @@ class Record(ABC):
     # [("my_function", "myString"), ("func2", "str2")]
     tpl_list = []
 
+    # Incremental runs (such as watch mode) cannot rebuild everything from
+    # the list of tuples on every change. Instead, file_funcs keeps the
+    # strings each function of each file contributed:
+    # {"a.c": {"my_function": ["myString"]}}
+
+    # and str_funcs keeps every function a string was found in, once per
+    # occurrence, which is all that is needed to decide uniqueness:
+    # {"myString": ["my_function"]}
+    file_funcs = {}
+    str_funcs = {}
+
+    # When memory_limit (in bytes) is set, the list of tuples is never
+    # allowed to grow past it. Instead it is sorted by string and spilled
+    # to a temporary run file, and the runs are later merged back together
+    # in a single streaming pass. A limit of 0 keeps everything in memory
+    memory_limit = 0
+    run_files = []
+
+    # Approximate bytes held per tuple beyond the characters of its two
+    # strings: the tuple itself, its list slot and two string headers
+    TUPLE_BYTES = 160
+
+    # Merging more runs than this at once would risk running out of file
+    # descriptors, so larger sets of runs are merged in several passes
+    MAX_OPEN_RUNS = 128
+
+    _list_bytes = 0
+    _counted = 0
+
+    # Deciding uniqueness exactly requires counting every string. In the
+    # "bloom" mode, a first pass through a pair of Bloom filters narrows
+    # down which strings may occur more than once, and only those are
+    # counted exactly in a second pass. The result is exact either way.
+    # A bloom_capacity of 0 sizes the filters to the list of tuples
+    UNIQUENESS_MODES = ("exact", "bloom")
+    uniqueness = "exact"
+    bloom_capacity = 0
+    bloom_fp_rate = 0.01
+
     @classmethod
     def integrate_list_to_dict(cls) -> None:
         """
@@ -83,6 +127,10 @@ class Record(ABC):
 
         :return: returns nothing
         """
+        if cls.uniqueness == "bloom":
+            cls.remove_non_unique_with_bloom()
+            return
+
         strings = []
         to_remove = []
 
@@ -101,6 +149,8 @@ class Record(ABC):
             if strings.count(string) > 1:
                 to_remove.append(string)
 
+        Metrics.set("tombstoned_strings", len(set(to_remove)))
+
         for removal in to_remove:
 
             # There are other ways to remove tuples that match the second
@@ -108,11 +158,53 @@ class Record(ABC):
             # the following list comprehension
             cls.tpl_list = [i for i in cls.tpl_list if i[1] != removal]
 
+    @classmethod
+    def remove_non_unique_with_bloom(cls) -> None:
+        """
+        Remove tuples that share non-unique strings using Bloom filters.
+
+        Any string seen a second time by the `seen` filter is added to the
+        `repeated` filter. A string which is not in `repeated` can only
+        have occurred once, since the filters never forget a string, so
+        it is confirmed unique without being counted. Only the candidates
+        in `repeated`, which are few when most strings are either unique
+        or extremely common, are counted exactly.
+
+        :return: returns nothing
+        """
+        from bloom.bloom import BloomFilter
+
+        capacity = cls.bloom_capacity or len(cls.tpl_list)
+        seen = BloomFilter(capacity, cls.bloom_fp_rate)
+        repeated = BloomFilter(capacity, cls.bloom_fp_rate)
+
+        for _, string in cls.tpl_list:
+            if seen.add(string):
+                repeated.add(string)
+
+        counts = {}
+        for _, string in cls.tpl_list:
+            if string in repeated:
+                counts[string] = counts.get(string, 0) + 1
+
+        LOGGER.info("Counted %d candidate strings of %d occurrences",
+                    len(counts),
+                    len(cls.tpl_list))
+        Metrics.set("tombstoned_strings",
+                    sum(1 for count in counts.values() if count > 1))
+
+        cls.tpl_list = [pair for pair in cls.tpl_list
+                        if counts.get(pair[1], 1) == 1]
+
     @classmethod
     def sort_tmp_list(cls) -> None:
         """
         Sort the `Record` list by function name.
 
+        The sort is stable, so tuples of the same function keep the order
+        they were found in. Sorting once at the end of a run therefore
+        yields the very same list as sorting after every file did.
+
         :return: returns nothing
         """
         # Sort the list of tuples by the first element (function name),
@@ -155,3 +247,221 @@ class Record(ABC):
         # Append to the end of the list. Order of tuples doesn't matter until
         # it comes time to insert unique tuples into the `Record` dictionary
         cls.tpl_list.append(tuple((new_func, new_string)))
+
+    @classmethod
+    def replace_file(cls, file_path: str, pairs: list) -> None:
+        """
+        Replace the contribution of a file to the incremental state.
+
+        Only the functions whose strings differ from what was previously
+        recorded for the file are touched, and only the strings of those
+        functions have their uniqueness in the `Record` dictionary updated.
+
+        :param file_path: file the tuples were extracted from
+        :param pairs: list of tuples in the format (function, string)
+        :return: returns nothing
+        """
+        new_funcs = {}
+        for func, string in pairs:
+            new_funcs.setdefault(func, []).append(string)
+
+        old_funcs = cls.file_funcs.get(file_path, {})
+        touched = set()
+
+        for func in old_funcs.keys() | new_funcs.keys():
+            old_strings = old_funcs.get(func, [])
+            new_strings = new_funcs.get(func, [])
+
+            # Functions which did not change are by far the common case
+            # when a single file is edited and saved
+            if old_strings == new_strings:
+                continue
+
+            for string in old_strings:
+                cls.str_funcs[string].remove(func)
+                touched.add(string)
+
+            for string in new_strings:
+                cls.str_funcs.setdefault(string, []).append(func)
+                touched.add(string)
+
+        if new_funcs:
+            cls.file_funcs[file_path] = new_funcs
+        else:
+            cls.file_funcs.pop(file_path, None)
+
+        cls.update_touched_strings(touched)
+
+    @classmethod
+    def remove_file(cls, file_path: str) -> None:
+        """
+        Remove the contribution of a file from the incremental state.
+
+        :param file_path: file which no longer exists or is no longer watched
+        :return: returns nothing
+        """
+        cls.replace_file(file_path, [])
+
+    @classmethod
+    def update_touched_strings(cls, touched: set) -> None:
+        """
+        Re-adjudicate the uniqueness of a set of strings.
+
+        A string is unique when it occurs exactly once across every file
+        in the incremental state, exactly as it is for a regular run.
+
+        :param touched: strings whose occurrences have changed
+        :return: returns nothing
+        """
+        for string in touched:
+            funcs = cls.str_funcs.get(string)
+
+            if funcs and len(funcs) == 1:
+                cls.str_func_dict[string] = funcs[0]
+
+            else:
+                cls.str_func_dict.pop(string, None)
+
+                if not funcs:
+                    cls.str_funcs.pop(string, None)
+
+    @classmethod
+    def spill_if_needed(cls) -> None:
+        """
+        Spill the list of tuples to disk if it has outgrown `memory_limit`.
+
+        Only the tuples added since the last call are measured, so calling
+        this after every file costs time proportional to that file alone.
+
+        :return: returns nothing
+        """
+        if not cls.memory_limit:
+            return
+
+        for func, string in itertools.islice(cls.tpl_list, cls._counted,
+                                             None):
+            cls._list_bytes += cls.TUPLE_BYTES + len(func) + len(string)
+        cls._counted = len(cls.tpl_list)
+
+        if cls._list_bytes > cls.memory_limit:
+            cls.spill()
+
+    @classmethod
+    def spill(cls) -> None:
+        """
+        Sort the list of tuples by string and write it out as a run file.
+
+        :return: returns nothing
+        """
+        if not cls.tpl_list:
+            return
+
+        cls.tpl_list.sort(key=operator.itemgetter(1, 0))
+        cls.run_files.append(cls.write_run(
+            (string, func) for func, string in cls.tpl_list))
+
+        LOGGER.info("Spilled %d tuples to %s", len(cls.tpl_list),
+                    cls.run_files[-1])
+
+        cls.tpl_list = []
+        cls._list_bytes = 0
+        cls._counted = 0
+
+    @staticmethod
+    def write_run(pairs) -> str:
+        """
+        Write string: function pairs, already ordered, to a new run file.
+
+        Each pair is written as a json array on its own line, which keeps
+        any character a string may contain intact.
+
+        :param pairs: iterable of tuples in the format (string, function)
+        :return run_path: path of the temporary run file
+        """
+        import tempfile
+
+        handle, run_path = tempfile.mkstemp(prefix="ida-cfp-", suffix=".run")
+
+        with open(handle, "w", encoding="utf-8") as outfile:
+            outfile.writelines(json.dumps(pair, ensure_ascii=False) + "\n"
+                               for pair in pairs)
+
+        return run_path
+
+    @staticmethod
+    def read_run(run_path: str):
+        """
+        Iterate the string: function pairs of a run file.
+
+        :param run_path: path of a run file
+        :return: generator of tuples in the format (string, function)
+        """
+        with open(run_path, encoding="utf-8") as infile:
+            for line in infile:
+                yield tuple(json.loads(line))
+
+    @classmethod
+    def iter_sorted_pairs(cls):
+        """
+        Iterate every string: function pair, ordered by string.
+
+        The spilled runs and whatever remains in memory are combined with
+        a k-way merge, so only a single pair per run is held at a time.
+
+        :return: generator of tuples in the format (string, function)
+        """
+        # Collapse the runs until few enough remain to be opened at once
+        while len(cls.run_files) > cls.MAX_OPEN_RUNS:
+            merging = cls.run_files[:cls.MAX_OPEN_RUNS]
+            merged = cls.write_run(heapq.merge(
+                *[cls.read_run(run_path) for run_path in merging]))
+
+            for run_path in merging:
+                os.remove(run_path)
+            cls.run_files = cls.run_files[cls.MAX_OPEN_RUNS:] + [merged]
+
+        in_memory = sorted((string, func) for func, string in cls.tpl_list)
+
+        return heapq.merge(in_memory,
+                           *[cls.read_run(run_path)
+                             for run_path in cls.run_files])
+
+    @classmethod
+    def iter_unique_pairs(cls):
+        """
+        Iterate the unique string: function pairs, ordered by string.
+
+        Equal strings are adjacent in the merged stream, so a string is
+        unique exactly when its group holds a single pair.
+
+        :return: generator of tuples in the format (string, function)
+        """
+        tombstoned = 0
+
+        try:
+            for _, group in itertools.groupby(cls.iter_sorted_pairs(),
+                                                   operator.itemgetter(0)):
+                pair = next(group)
+
+                if next(group, None) is None:
+                    yield pair
+                else:
+                    tombstoned += 1
+
+            Metrics.set("tombstoned_strings", tombstoned)
+
+        finally:
+            cls.remove_runs()
+
+    @classmethod
+    def remove_runs(cls) -> None:
+        """
+        Delete every temporary run file.
+
+        :return: returns nothing
+        """
+        for run_path in cls.run_files:
+            if os.path.isfile(run_path):
+                os.remove(run_path)
+
+        cls.run_files = []
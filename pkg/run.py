@@ -3,19 +3,46 @@ Defines main.
 
 Instantiates the root-level logging instance, which is used throughout
 the six distinct modules and broadly manages program flow.
+
+Only the modules needed by every mode are imported up front. Everything
+else, and above all the parser, is imported by the mode which uses it, as
+imports make up most of the wall time of a short run.
 """
 
 import argparse
 import logging
+import os
 import sys
+import time
 
-from core.core import Core
-from verifier.verifier import Verifier
+from logger.logger import Logger
 
 # Logger instances are named according to their module __name__. This is
 # true across each sub-module of the project.
 LOGGER = logging.getLogger(__name__)
 
+# Suffixes accepted by sizes given on the command line, such as 512M
+SIZE_SUFFIXES = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30,
+                 "T": 1 << 40}
+
+
+def parse_size(text: str) -> int:
+    """
+    Convert a human readable size such as 512M or 2G to bytes.
+
+    :param text: size with an optional K, M, G or T suffix
+    :return int: number of bytes
+    """
+    text = text.strip().upper().rstrip("B")
+    suffix = text[-1:] if text[-1:] in SIZE_SUFFIXES else ""
+
+    try:
+        return int(float(text[:len(text) - len(suffix)]) *
+                   SIZE_SUFFIXES[suffix])
+
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid size: " + text)
+
 
 def main() -> int:
     """
@@ -28,6 +55,28 @@ def main() -> int:
     This method exists largely as a pseudo-manager for keeping track of program
     flow and high-level return codes.
     """
+    # Subcommands are dispatched before the main parser sees the arguments,
+    # as its positional files would otherwise swallow the command name
+    if sys.argv[1:2] == ["merge"]:
+        return merge(sys.argv[2:])
+
+    if sys.argv[1:2] == ["bench"]:
+        return bench(sys.argv[2:])
+
+    if sys.argv[1:2] == ["scan"]:
+        return scan(sys.argv[2:])
+
+    if sys.argv[1:2] == ["stoplist"]:
+        return stoplist(sys.argv[2:])
+
+    if sys.argv[1:2] == ["index"]:
+        return index(sys.argv[2:])
+
+    from metrics.metrics import Metrics
+    from progress.progress import Progress
+    from record.record import Record
+    from verifier.verifier import Verifier
+
     # Define a program for the argument argparser
     argparser = argparse.ArgumentParser(description="C file parser for unique \
         strings and their associated functions")
@@ -36,33 +85,710 @@ def main() -> int:
     argparser.add_argument("-v", "--verbose", help="Set verbosity/\
         debug level", action="store_true")
 
+    # Verbose records can additionally be kept in a size-bounded set of
+    # rotating files, which is handy for auditing long production runs
+    argparser.add_argument("--log-file", help="Also write log records to \
+        this rotating log file")
+
+    # Validation beyond the bare minimum costs time on every function of
+    # every file, so the amount of checking is left up to the user
+    argparser.add_argument("--validate", choices=Verifier.LEVELS,
+                           default=Verifier.VALIDATE_FULL,
+                           help="Amount of program state checking performed")
+
+    # Rather than processing a fixed set of files once, a directory tree
+    # can be watched and the bundle kept current as its files change
+    argparser.add_argument("--watch", metavar="DIR", help="Watch a \
+        directory for changed C files and keep the bundle current")
+
+    # Very large bundles are better split into hash-partitioned shards,
+    # which can be rewritten and loaded individually
+    argparser.add_argument("--shards", type=int, default=0, metavar="N",
+                           help="Write the bundle as N shards under \
+        out/shards/ instead of a single out/bundle.json")
+
+    # Bundles of large SDKs are highly repetitive, and shrink to a small
+    # fraction of their size when compressed
+    argparser.add_argument("--output", metavar="PATH", help="Write the \
+        bundle to PATH instead of out/bundle.json, compressed with gzip or \
+        xz if PATH ends in .gz or .xz")
+
+    # Every occurrence found can be streamed out as it is found, which
+    # lets other tools aggregate the results however they please
+    argparser.add_argument("--events", metavar="NDJSON", help="Stream one \
+        json line per string occurrence to this file")
+
+    # Corpora too large to keep in memory can keep their occurrences in
+    # a SQLite database instead, which persists between runs
+    argparser.add_argument("--store", metavar="DB", help="Keep occurrences \
+        in this SQLite database rather than in memory")
+
+    # Corpora whose occurrences do not fit in memory are sorted and
+    # spilled to temporary files whenever the limit is reached
+    argparser.add_argument("--memory-limit", type=parse_size, default=0,
+                           metavar="SIZE", help="Spill occurrences to disk \
+        to keep them under this size, e.g. 512M")
+
+    # Uniqueness can be narrowed down through Bloom filters first, which
+    # keeps exact counting to the strings that may occur more than once
+    argparser.add_argument("--uniqueness", choices=Record.UNIQUENESS_MODES,
+                           default="exact", help="How strings that occur \
+        more than once are found, the result is exact either way")
+    argparser.add_argument("--bloom-capacity", type=int, default=0,
+                           metavar="N", help="Expected number of strings \
+        each Bloom filter holds, by default the number of occurrences")
+    argparser.add_argument("--bloom-fp-rate", type=float, default=0.01,
+                           metavar="RATE", help="Target false-positive \
+        rate of each Bloom filter")
+
+    # Runs over slices of a corpus, possibly on different machines, can
+    # write partial results which are later combined with `merge`
+    argparser.add_argument("--emit-partial", metavar="PARTIAL",
+                           help="Write a mergeable partial result instead \
+        of the bundle")
+
+    # Spawning one pre-processor per file dominates the run time of large
+    # numbers of small files, so several files can share a single one
+    argparser.add_argument("--batch-size", type=int, default=1, metavar="N",
+                           help="Pre-process N files per clang invocation")
+
+    # Long runs can report how far along they are, rewriting a single
+    # line on a terminal and appending plain lines anywhere else
+    argparser.add_argument("--progress", choices=Progress.MODES,
+                           default="off", help="Show files done, throughput \
+        and ETA on stderr, auto picks tty or plain")
+
+    # Each file can instead be extracted in a pool of worker processes,
+    # where a file that hangs, crashes or runs out of memory is retried
+    # once and then reported rather than ending the whole run
+    argparser.add_argument("--jobs", type=int, default=0, metavar="N",
+                           help="Extract files in N isolated worker \
+        processes")
+    argparser.add_argument("--file-timeout", type=float, metavar="SEC",
+                           help="Give up on a file after SEC seconds, \
+        implies isolated workers")
+    argparser.add_argument("--file-memory", type=parse_size, metavar="SIZE",
+                           help="Cap the memory of each worker to SIZE, \
+        implies isolated workers")
+    argparser.add_argument("--failure-report", metavar="JSON",
+                           help="Write the files which failed to this \
+        file, implies isolated workers")
+
+    # Workers sized by processors alone run out of memory on a handful of
+    # huge files, so files are only handed out while their predicted
+    # memory fits, and workers are replaced before fragmentation adds up
+    argparser.add_argument("--pool-memory", type=parse_size, metavar="SIZE",
+                           help="Only hand out files while their predicted \
+        memory adds up to less than SIZE, implies isolated workers")
+    argparser.add_argument("--worker-max-tasks", type=int, metavar="N",
+                           help="Replace each worker after N files, \
+        implies isolated workers")
+    argparser.add_argument("--worker-max-rss", type=parse_size,
+                           metavar="SIZE", help="Replace a worker once its \
+        resident memory passes SIZE, implies isolated workers")
+
+    # Every run can leave behind metrics for capacity planning, written
+    # as json and for the textfile collector of a Prometheus node exporter
+    argparser.add_argument("--metrics-file", metavar="PATH", help="Write \
+        run metrics to PATH.json and PATH.prom")
+
+    # Files can be parsed by clang itself instead of by PycParser, which
+    # copes with anything clang does, GNU extensions included
+    argparser.add_argument("--frontend", choices=("pycparser", "clang-json"),
+                           default="pycparser", help="Parse files with \
+        PycParser or from the json AST dump of clang")
+
+    # Files which cannot contain a string literal are common in some
+    # corpora, and each would otherwise cost a clang spawn and a parse
+    argparser.add_argument("--prescan", action="store_true", help="Skip \
+        files whose bytes, and those of their local includes, hold no \
+        string literal")
+
+    # Re-runs over files which change a little at a time only need to walk
+    # the functions which changed, given the cache of a previous run
+    argparser.add_argument("--func-cache", metavar="JSON", help="Reuse and \
+        update the strings of unchanged files and functions kept in this \
+        cache")
+
+    # Strings known to be common from previous runs are dropped as soon
+    # as they are extracted, which exact runs can opt out of
+    argparser.add_argument("--stoplist", metavar="PATH", help="Drop the \
+        strings of this stoplist at extraction, out/stoplist.bin is used by \
+        default whenever it exists")
+    argparser.add_argument("--no-stoplist", action="store_true",
+                           help="Keep every string, even those on a stoplist")
+
     # A user may specify n files as positional arguments
-    argparser.add_argument("files", type=argparse.FileType("r"), nargs="+")
+    argparser.add_argument("files", type=argparse.FileType("r"), nargs="*")
 
     # Grab the arguments from the command line
     args = argparser.parse_args()
 
-    # Configures the hierarchical (root-level) logger instance
+    if not args.files and not args.watch:
+        argparser.error("either files or --watch DIR must be specified")
+
+    if args.shards < 0:
+        argparser.error("--shards must not be negative")
+
+    if args.output and args.shards:
+        argparser.error("--output does not apply to a sharded bundle")
+
+    if not 0 < args.bloom_fp_rate < 1:
+        argparser.error("--bloom-fp-rate must be between 0 and 1")
+
+    if args.frontend == "clang-json" and args.batch_size > 1:
+        argparser.error("--batch-size only applies to the pycparser frontend")
+
+    if args.jobs < 0:
+        argparser.error("--jobs must not be negative")
+
+    if args.file_timeout is not None and args.file_timeout <= 0:
+        argparser.error("--file-timeout must be positive")
+
+    if args.worker_max_tasks is not None and args.worker_max_tasks < 1:
+        argparser.error("--worker-max-tasks must be positive")
+
+    isolated = bool(args.jobs or args.file_timeout or args.file_memory or
+                    args.failure_report or args.pool_memory or
+                    args.worker_max_tasks or args.worker_max_rss)
+
+    if args.stoplist and args.no_stoplist:
+        argparser.error("--stoplist and --no-stoplist are mutually exclusive")
+
+    if args.func_cache and (args.frontend != "pycparser" or isolated):
+        argparser.error("--func-cache only applies to the pycparser frontend \
+without isolated workers")
+
+    # Configures the hierarchical (root-level) logger instance. Records
+    # are handed to a writer thread so that formatting and writing them
+    # never blocks the processing of files. Isolated workers hand their
+    # records to the same writer, which then needs a queue shared between
+    # processes
     # TODO: Granularity beyond ON/OFF may follow in future releases
-    if args.verbose:
-        logging.basicConfig(level=logging.DEBUG)
+    if args.verbose or args.log_file:
+        Logger.start(logging.DEBUG if args.verbose else logging.WARNING,
+                     args.log_file, multiprocess=isolated)
+
+    Verifier.set_level(args.validate)
+    Record.memory_limit = args.memory_limit
+    Record.uniqueness = args.uniqueness
+    Record.bloom_capacity = args.bloom_capacity
+    Record.bloom_fp_rate = args.bloom_fp_rate
+
+    if args.metrics_file:
+        Metrics.enable()
+
+    if args.output:
+        from interface.interface import Interface
+        Interface.set_out_file_path(args.output)
+
+    try:
+        if not args.no_stoplist:
+            from stoplist.stoplist import Stoplist
+
+            if args.stoplist or os.path.isfile(Stoplist.DEFAULT_PATH):
+                args.stoplist = args.stoplist or Stoplist.DEFAULT_PATH
+                Stoplist.load(args.stoplist)
+
+        status = run(args, isolated)
+
+        if args.metrics_file:
+            Metrics.write(args.metrics_file)
+
+        return status
+
+    finally:
+        # Every queued record is written out before the program exits
+        Logger.stop()
+
+
+def run(args: argparse.Namespace, isolated: bool = False) -> int:
+    """
+    Process the files specified on the command line into a bundle.
+
+    :param args: parsed command line arguments
+    :param isolated: whether files are extracted in worker processes
+    :return: returns 0 on success, 1 if any isolated file failed
+    """
+    if args.watch:
+        # Imported here as the watcher is only needed for this one mode
+        from watcher.watcher import Watcher
+
+        Watcher(args.watch, args.shards, args.func_cache).run()
+        return 0
+
+    from core.core import Core
+    from metrics.metrics import Metrics
+    from verifier.verifier import Verifier
+
+    supervisor = None
+    if isolated:
+        from scheduler.scheduler import Scheduler
+        from supervisor.supervisor import Supervisor
+
+        # Memory rather than processors limits the work in progress, so a
+        # worker per processor is only the upper bound
+        jobs = args.jobs or (os.cpu_count() or 1 if args.pool_memory else 1)
+
+        supervisor = Supervisor(jobs, args.file_timeout, args.file_memory,
+                                args.frontend,
+                                None if args.no_stoplist else args.stoplist,
+                                Scheduler(args.pool_memory),
+                                args.worker_max_tasks, args.worker_max_rss)
+
+    func_cache = None
+    if args.func_cache:
+        from funccache.funccache import FuncCache
+
+        func_cache = FuncCache(args.func_cache)
+
+    progress = None
+    if args.progress != "off":
+        from progress.progress import Progress
+
+        progress = Progress([f.name for f in args.files], args.progress)
 
     # Create an instance of `Core`, which is responsible for managing
     # high level functionality and program flow
-    mngr = Core()
+    mngr = Core(args.events, args.store, args.emit_partial, args.batch_size,
+                supervisor, progress, args.frontend, args.prescan,
+                func_cache)
+
+    try:
+        # Double check that the files specified on the command line are
+        # in the proper mode and exist at the correct location
+        Verifier.check_parsable(args.files)
+
+        # Process each file, appending unique func:str pairs as found
+        mngr.process_files(args.files)
+
+        # Files which failed are left out of the bundle, but the run is
+        # still reported as failed so that scripts notice
+        status = 0
+        if supervisor:
+            if args.failure_report:
+                supervisor.write_report(args.failure_report)
+            Metrics.count("files_failed_total", len(supervisor.failures))
+            if supervisor.failures:
+                LOGGER.error("%d of %d files failed", len(supervisor.failures),
+                             len(args.files))
+                status = 1
+
+        start = time.perf_counter()
+
+        if args.emit_partial:
+            mngr.export_partial()
+
+        elif args.shards:
+            # Shards are written straight from the master dictionary, which
+            # skips building the single json string entirely
+            mngr.export_shards(args.shards)
+
+        else:
+            # Ultimately produce a final dictionary and convert to JSON
+            mngr.generate_bundle()
+
+            # Drop the JSON bundle to disk under the out/ directory
+            mngr.export()
+
+        Metrics.observe("export", time.perf_counter() - start)
+
+    finally:
+        mngr.close()
+
+    return status
+
+
+def merge(argv: list) -> int:
+    """
+    Merge partial results into a single bundle or partial result.
+
+    :param argv: command line arguments following `merge`
+    :return: returns 0 on success
+    """
+    argparser = argparse.ArgumentParser(prog="run.py merge",
+                                        description="Merge partial results \
+        written by --emit-partial into the final bundle")
+
+    argparser.add_argument("-v", "--verbose", help="Set verbosity/\
+        debug level", action="store_true")
+
+    # Merging is associative, so partials of partials are just as valid
+    argparser.add_argument("--emit-partial", metavar="PARTIAL",
+                           help="Write the merge as another partial result \
+        instead of the bundle")
+
+    argparser.add_argument("--output", metavar="PATH", help="Write the \
+        bundle to PATH instead of out/bundle.json, compressed with gzip or \
+        xz if PATH ends in .gz or .xz")
+
+    argparser.add_argument("partials", nargs="+")
+
+    args = argparser.parse_args(argv)
+
+    if args.verbose:
+        Logger.start(logging.DEBUG)
+
+    # Imported here as merging needs neither the parser nor `Core`
+    from interface.interface import Interface
+    from partial.partial import Partial
+
+    if args.output:
+        Interface.set_out_file_path(args.output)
+
+    try:
+        summaries = Partial.merge(args.partials)
+
+        if args.emit_partial:
+            Partial.write(args.emit_partial, summaries)
+        else:
+            Interface().stream_bundle_to_disk(Partial.unique_pairs(summaries))
+
+    finally:
+        Logger.stop()
+
+    return 0
+
+
+def scan(argv: list) -> int:
+    """
+    Locate every string of a bundle within a raw binary blob.
+
+    :param argv: command line arguments following `scan`
+    :return: returns 0 on success
+    """
+    argparser = argparse.ArgumentParser(prog="run.py scan",
+                                        description="Find every offset of \
+        each bundle string within a raw binary, such as a firmware image")
+
+    argparser.add_argument("-v", "--verbose", help="Set verbosity/\
+        debug level", action="store_true")
+
+    argparser.add_argument("--bundle", help="Bundle to take the strings \
+        from, compressed or not, out/bundle.json by default")
+
+    # Mapping a multi-gigabyte image is fine on 64-bit hosts, anywhere
+    # else the blob can be read a chunk at a time instead
+    argparser.add_argument("--stream", action="store_true",
+                           help="Read the blob in chunks instead of \
+        memory-mapping it")
+
+    argparser.add_argument("--output", help="Write the offsets as json to \
+        this file instead of listing them")
+
+    argparser.add_argument("blob")
+
+    args = argparser.parse_args(argv)
+
+    if args.verbose:
+        Logger.start(logging.DEBUG)
+
+    import json
+
+    from interface.interface import Interface
+    from scanner.scanner import Scanner
+
+    try:
+        bundle = Interface.load_bundle(args.bundle)
+        offsets = Scanner(bundle).scan_file(args.blob, args.stream)
+
+    finally:
+        Logger.stop()
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump({string: {"function": bundle[string],
+                                "offsets": found}
+                       for string, found in sorted(offsets.items())},
+                      outfile, indent=4)
+    else:
+        for offset, string in sorted((offset, string)
+                                     for string, found in offsets.items()
+                                     for offset in found):
+            print("0x{:08x}  {}  {}".format(offset, bundle[string], string))
+
+    return 0
+
+
+def stoplist(argv: list) -> int:
+    """
+    Build a stoplist of common strings from the output of previous runs.
+
+    :param argv: command line arguments following `stoplist`
+    :return: returns 0 on success
+    """
+    argparser = argparse.ArgumentParser(prog="run.py stoplist",
+                                        description="Manage the stoplist of \
+        strings dropped at extraction")
+    commands = argparser.add_subparsers(dest="command")
+    commands.required = True
+
+    # Events and partials are told apart line by line, so both can be
+    # mixed freely
+    build = commands.add_parser("build", help="Build a stoplist from the \
+        events or partial results of previous runs")
+    build.add_argument("-v", "--verbose", help="Set verbosity/\
+        debug level", action="store_true")
+    build.add_argument("--min-count", type=int, metavar="N",
+                       help="Stoplist strings occurring at least N times, \
+        10 by default")
+    build.add_argument("--output", metavar="PATH", help="Write the \
+        stoplist to PATH instead of out/stoplist.bin")
+    build.add_argument("files", nargs="+", metavar="FILE",
+                       help="Events written by --events or partial \
+        results written by --emit-partial")
+
+    args = argparser.parse_args(argv)
+
+    if args.min_count is not None and args.min_count < 2:
+        argparser.error("--min-count must be at least 2, or unique strings \
+would be dropped")
+
+    if args.verbose:
+        Logger.start(logging.DEBUG)
+
+    from stoplist.stoplist import Stoplist
+
+    try:
+        count = Stoplist.build(args.files, args.output, args.min_count)
+
+    finally:
+        Logger.stop()
+
+    print("{} strings stoplisted".format(count))
+
+    return 0
+
+
+def index(argv: list) -> int:
+    """
+    Build or query the prefix and substring index of a bundle.
+
+    :param argv: command line arguments following `index`
+    :return: returns 0 on success, 1 if a query found nothing
+    """
+    argparser = argparse.ArgumentParser(prog="run.py index",
+                                        description="Find bundle strings by \
+        prefix or substring, as IDA often shows them cut short or split")
+    commands = argparser.add_subparsers(dest="command")
+    commands.required = True
+
+    # The index is kept next to the bundle, and mapped rather than loaded
+    # by every query
+    build = commands.add_parser("build", help="Index the strings of a \
+        bundle")
+    build.add_argument("-v", "--verbose", help="Set verbosity/\
+        debug level", action="store_true")
+    build.add_argument("--bundle", help="Bundle to index, compressed or \
+        not, out/bundle.json by default")
+    build.add_argument("--output", metavar="PATH", help="Write the index \
+        to PATH instead of next to the bundle")
+
+    query = commands.add_parser("query", help="List the bundle strings \
+        starting with, or containing, a probe")
+    query.add_argument("--index", metavar="PATH", help="Index to query, \
+        out/bundle.idx by default")
+    query.add_argument("--substring", action="store_true",
+                       help="Match the probe anywhere rather than only at \
+        the start of a string")
+    query.add_argument("--limit", type=int, default=50, metavar="N",
+                       help="List at most N strings")
+    query.add_argument("probe", help="String as spelled in the bundle")
+
+    args = argparser.parse_args(argv)
+
+    from interface.interface import Interface
+    from keyindex.keyindex import KeyIndex
+
+    if args.command == "build":
+        if args.verbose:
+            Logger.start(logging.DEBUG)
+
+        bundle_path = args.bundle or Interface.OUT_FILE_PATH
+
+        try:
+            count = KeyIndex.build(Interface.load_bundle(bundle_path),
+                                   args.output or
+                                   KeyIndex.path_for(bundle_path))
+
+        finally:
+            Logger.stop()
+
+        print("{} suffixes indexed".format(count))
+
+        return 0
+
+    key_index = KeyIndex(args.index or
+                         KeyIndex.path_for(Interface.OUT_FILE_PATH))
+
+    try:
+        if args.substring:
+            pairs = key_index.substring(args.probe, args.limit)
+        else:
+            pairs = key_index.prefix(args.probe, args.limit)
+
+    finally:
+        key_index.close()
+
+    for string, func in pairs:
+        print("{}  {}".format(func, string))
+
+    return 0 if pairs else 1
+
+
+def bench(argv: list) -> int:
+    """
+    Benchmark IDA-CFP itself.
+
+    :param argv: command line arguments following `bench`
+    :return: returns 0 on success
+    """
+    argparser = argparse.ArgumentParser(prog="run.py bench",
+                                        description="Benchmark IDA-CFP")
+    commands = argparser.add_subparsers(dest="command")
+    commands.required = True
+
+    # The stages of a run are measured separately, so that a slowdown
+    # can be pinned on the one responsible
+    stages = commands.add_parser("run", help="Measure the visitor, Record, \
+        export and end to end stages over the same files")
+    stages.add_argument("--repeat", type=int, default=5)
+    stages.add_argument("--entry", help="run.py or zipapp of the end to \
+        end stage")
+    stages.add_argument("--output", help="Write the results to this file")
+    stages.add_argument("--save-baseline", action="store_true",
+                        help="Store the results as the baseline later \
+        comparisons default to")
+    stages.add_argument("files", nargs="+")
+
+    # Comparisons exit non-zero on a regression, so that they can gate a
+    # CI job
+    compare = commands.add_parser("compare", help="Compare two sets of \
+        results, or one against the stored baseline")
+    compare.add_argument("--threshold", type=float, help="Relative \
+        slowdown of a stage allowed before it counts as a regression, 0.05 \
+        by default")
+    compare.add_argument("--output", help="Write the comparison to this file")
+    compare.add_argument("results", nargs="+", metavar="RESULTS",
+                         help="Baseline and current results, or only the \
+        current results")
+
+    # Adding occurrences to the `Record` should cost the same per file
+    # however large the corpus grows
+    ingest = commands.add_parser("ingest", help="Measure the time taken to \
+        record each file's occurrences as the corpus grows")
+    ingest.add_argument("--files", type=int, default=2000)
+    ingest.add_argument("--per-file", type=int, default=200)
+    ingest.add_argument("--per-file-sort", action="store_true",
+                        help="Sort the whole list after every file, as was \
+        once done, for comparison")
+    ingest.add_argument("--output", help="Write the results to this file")
+
+    # Both frontends are run over the same files and their strings compared
+    frontends = commands.add_parser("frontends", help="Compare the strings \
+        and speed of the pycparser and clang-json frontends")
+    frontends.add_argument("--self-check", action="store_true",
+                           help="Compare pycparser against itself, which \
+        must find no difference, instead of against clang-json")
+    frontends.add_argument("--output", help="Write the results to this file")
+    frontends.add_argument("files", nargs="+")
+
+    # Everything after the options is handed to the measured process
+    coldstart = commands.add_parser("coldstart", help="Measure interpreter \
+        start-up and import time of a fresh process")
+    coldstart.add_argument("--repeat", type=int, default=10)
+    coldstart.add_argument("--entry", help="run.py or zipapp to measure")
+    coldstart.add_argument("--output", help="Write the results to this file")
+    coldstart.add_argument("args", nargs=argparse.REMAINDER,
+                           help="Arguments of the measured process")
+
+    args = argparser.parse_args(argv)
+
+    if args.command == "compare" and len(args.results) > 2:
+        argparser.error("compare takes at most two sets of results")
+
+    from bench.bench import Bench
+
+    if args.command == "run":
+        results = Bench.stages(args.files, args.repeat, args.entry)
+
+        print(Bench.summarize(results))
+
+        if args.output:
+            Bench.save(results, args.output)
+        if args.save_baseline:
+            Bench.save_baseline(results)
+
+    if args.command == "compare":
+        baseline_path = args.results[0] if len(args.results) == 2 else \
+            Bench.BASELINE_PATH
+
+        # A missing file would otherwise exit 1 just like a regression
+        if not os.path.isfile(baseline_path):
+            argparser.error("no baseline at {}, store one with 'bench run "
+                            "--save-baseline'".format(baseline_path))
+        if not os.path.isfile(args.results[-1]):
+            argparser.error("no results at {}".format(args.results[-1]))
+
+        comparison = Bench.compare(Bench.load(baseline_path),
+                                   Bench.load(args.results[-1]),
+                                   args.threshold)
+
+        print(Bench.summarize_comparison(comparison))
+
+        if args.output:
+            Bench.save(comparison, args.output)
+
+        return 1 if comparison["regressions"] else 0
+
+    if args.command == "coldstart":
+        measured = args.args[1:] if args.args[:1] == ["--"] else args.args
+        results = Bench.cold_start(measured or ["--help"], args.repeat,
+                                   args.entry)
+
+        print(Bench.summarize(results))
+        for name, seconds in results["slowest_imports"].items():
+            print("    {:<24} {:>10.6f} s".format(name, seconds))
+
+        if args.output:
+            Bench.save(results, args.output)
+
+    if args.command == "ingest":
+        results = Bench.ingest(args.files, args.per_file, args.per_file_sort)
+
+        print(Bench.summarize(results))
+        print("last/first tenth per file: {:.2f}x".format(
+            results["ingest_growth"]))
+
+        if args.output:
+            Bench.save(results, args.output)
+
+    if args.command == "frontends":
+        results = Bench.compare_frontends(
+            args.files, Bench.pycparser_occurrences if args.self_check
+            else None)
 
-    # Double check that the files specified on the command line are
-    # in the proper mode and exist at the correct location
-    Verifier.check_parsable(args.files)
+        print(Bench.summarize(results))
+        for file_path, difference in results["differences"].items():
+            print(file_path)
+            for func, string in difference["only_pycparser"]:
+                print("    - {}: {}".format(func, string))
+            for func, string in difference["only_clang_json"]:
+                print("    + {}: {}".format(func, string))
 
-    # Process each file, appending unique func:str pairs as found
-    mngr.process_files(args.files)
+        # Constants other than strings are only reported by pycparser, so
+        # they are listed apart and do not fail the comparison
+        for file_path, divergence in results["divergences"].items():
+            print(file_path)
+            for func, string in divergence["only_pycparser_constants"]:
+                print("    ~ {}: {} (not a string literal)".format(func,
+                                                                  string))
 
-    # Ultimately produce a final dictionary and convert to JSON
-    mngr.generate_bundle()
+        if args.output:
+            Bench.save(results, args.output)
 
-    # Drop the JSON bundle to disk under the out/ directory
-    mngr.export()
+        # Any difference at all fails, so that it can gate a CI job
+        return 1 if results["differences"] else 0
 
     return 0
 
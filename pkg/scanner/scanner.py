@@ -0,0 +1,281 @@
+"""
+Defines `Scanner`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import mmap
+import os
+import re
+import time
+from abc import ABC
+from collections import deque
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Scanner(ABC):
+    """
+    Define the object responsible for locating bundle strings in a blob.
+
+    Stripped firmware images rarely have sections worth the name, so the
+    strings of a bundle are searched for in the raw bytes instead. Every
+    string is decoded from its C spelling to the bytes a compiler would
+    emit, and all of them are built into a single Aho-Corasick automaton,
+    so the blob is read exactly once however many strings there are.
+
+    Whenever the automaton is back at its root, it skips straight to the
+    next byte which starts any string at all. Padding and code regions
+    are thereby passed over at the speed of the regular expression engine
+    rather than one byte at a time.
+
+    Blobs are memory-mapped, or read in chunks of `CHUNK_SIZE` when asked
+    to stream. The state of the automaton is carried from one chunk to the
+    next, so a string straddling two chunks is found without any bytes
+    being scanned twice.
+
+    `ESCAPE` matches a single escape sequence of a C string literal, or a
+    pair of escaped UTF-16 surrogates left behind by json.
+
+    `SIMPLE_ESCAPES` holds the bytes of each single character escape.
+    """
+
+    CHUNK_SIZE = 64 << 20
+
+    ESCAPE = re.compile(
+        r"\\(?:u(d[89ab][0-9a-f]{2})\\u(d[c-f][0-9a-f]{2})"
+        r"|([0-7]{1,3})|x([0-9a-fA-F]+)|u([0-9a-fA-F]{4})"
+        r"|U([0-9a-fA-F]{8})|(.))", re.DOTALL)
+
+    SIMPLE_ESCAPES = {"a": b"\a", "b": b"\b", "e": b"\x1b", "f": b"\f",
+                      "n": b"\n", "r": b"\r", "t": b"\t", "v": b"\v"}
+
+    def __init__(self, strings) -> None:
+        """
+        Initialize the `Scanner` object and build its automaton.
+
+        `self.strings` holds every string given, in their C spelling.
+        Strings which decode to the same bytes share a single pattern, and
+        `self.owners` holds the indices of the strings of each pattern.
+
+        `self.goto`, `self.fail` and `self.out` are the transitions, the
+        failure links and the patterns ending at each state.
+
+        :param strings: iterable of strings as spelled in the C source
+        :return: returns nothing
+        """
+        self.strings = list(strings)
+        self.patterns = []
+        self.owners = []
+
+        indices = {}
+        for index, string in enumerate(self.strings):
+            pattern = self.decode_literal(string)
+
+            # An empty string is found everywhere, and thus nowhere
+            if not pattern:
+                continue
+
+            if pattern not in indices:
+                indices[pattern] = len(self.patterns)
+                self.patterns.append(pattern)
+                self.owners.append([])
+
+            self.owners[indices[pattern]].append(index)
+
+        self.lengths = [len(pattern) for pattern in self.patterns]
+        self.build()
+
+    def build(self) -> None:
+        """
+        Build the trie of every pattern along with its failure links.
+
+        :return: returns nothing
+        """
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for byte in pattern:
+                following = self.goto[state].get(byte)
+                if following is None:
+                    following = len(self.goto)
+                    self.goto[state][byte] = following
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+
+                state = following
+
+            self.out[state] += (index,)
+
+        # Failure links are set breadth first, so the link of every
+        # shallower state is known by the time it is followed
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+
+            for byte, following in self.goto[state].items():
+                queue.append(following)
+
+                fallback = self.fail[state]
+                while fallback and byte not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                self.fail[following] = self.goto[fallback].get(byte, 0)
+                self.out[following] += self.out[self.fail[following]]
+
+        first_bytes = b"".join(re.escape(bytes([byte]))
+                               for byte in sorted(self.goto[0]))
+        self.skip = re.compile(b"[" + first_bytes + b"]") \
+            if first_bytes else None
+
+        LOGGER.debug("Built %d states for %d patterns", len(self.goto),
+                     len(self.patterns))
+
+    @classmethod
+    def decode_literal(cls, string: str) -> bytes:
+        """
+        Convert a string as spelled in the C source to its bytes.
+
+        Characters outside of escape sequences, and universal character
+        names, are encoded as UTF-8, the execution character set of both
+        GCC and clang. Hex and octal escapes are taken as single bytes.
+
+        :param string: contents of a C string literal
+        :return bytes: bytes of the string as emitted by a compiler
+        """
+        parts = []
+        position = 0
+
+        for match in cls.ESCAPE.finditer(string):
+            parts.append(string[position:match.start()].encode("utf-8"))
+            position = match.end()
+
+            high, low, octal, hexadecimal, short, long, char = match.groups()
+
+            if high:
+                parts.append((chr(int(high, 16)) + chr(int(low, 16)))
+                             .encode("utf-16", "surrogatepass")
+                             .decode("utf-16").encode("utf-8"))
+            elif octal:
+                parts.append(bytes([int(octal, 8) & 0xFF]))
+            elif hexadecimal:
+                parts.append(bytes([int(hexadecimal, 16) & 0xFF]))
+            elif short or long:
+                parts.append(chr(int(short or long, 16))
+                             .encode("utf-8", "surrogatepass"))
+            else:
+                # Escaped quotes, backslashes and question marks, as well
+                # as any unknown escape, stand for the character itself
+                parts.append(cls.SIMPLE_ESCAPES.get(char,
+                                                    char.encode("utf-8")))
+
+        parts.append(string[position:].encode("utf-8"))
+        return b"".join(parts)
+
+    def iter_matches(self, chunks):
+        """
+        Feed consecutive chunks of a blob through the automaton.
+
+        :param chunks: iterable of bytes-like chunks, in order
+        :return generator: tuples in the format (offset, pattern index)
+        """
+        goto = self.goto
+        fail = self.fail
+        out = self.out
+        lengths = self.lengths
+        skip = self.skip
+
+        state = 0
+        base = 0
+
+        for data in chunks:
+            position = 0
+            end = len(data)
+
+            while skip and position < end:
+                if not state:
+                    match = skip.search(data, position)
+                    if match is None:
+                        break
+                    position = match.start()
+
+                byte = data[position]
+                while state and byte not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(byte, 0)
+
+                for index in out[state]:
+                    yield base + position - lengths[index] + 1, index
+
+                position += 1
+
+            base += end
+
+    @classmethod
+    def iter_chunks(cls, infile, chunk_size: int = None):
+        """
+        Read a file in chunks until it is exhausted.
+
+        :param infile: file opened in binary mode
+        :param chunk_size: bytes per chunk, `CHUNK_SIZE` by default
+        :return generator: bytes of each chunk
+        """
+        while True:
+            chunk = infile.read(chunk_size or cls.CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def scan_file(self, file_path: str, stream: bool = False) -> dict:
+        """
+        Locate every string of the scanner within a file.
+
+        The file is memory-mapped unless streaming is asked for, or it
+        cannot be mapped at all, such as a pipe.
+
+        :param file_path: blob to be scanned
+        :param stream: whether to read the file in chunks
+        :return offsets: dictionary of string: sorted list of offsets, of
+            the strings found at least once
+        """
+        offsets = {}
+        start = time.perf_counter()
+
+        with open(file_path, "rb") as infile:
+            size = os.fstat(infile.fileno()).st_size
+            data = None
+
+            if not stream and size:
+                try:
+                    data = mmap.mmap(infile.fileno(), 0,
+                                     access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    LOGGER.debug("Could not map %s, streaming instead",
+                                 file_path)
+
+            try:
+                chunks = [data] if data is not None else \
+                    self.iter_chunks(infile)
+
+                for offset, index in self.iter_matches(chunks):
+                    offsets.setdefault(index, []).append(offset)
+
+            finally:
+                if data is not None:
+                    data.close()
+
+        elapsed = time.perf_counter() - start
+        LOGGER.info("Scanned %d bytes in %.2f s, %d of %d patterns found",
+                    size, elapsed, len(offsets), len(self.patterns))
+
+        # The automaton reports matches by where they end, so the offsets
+        # of a pattern are already in order
+        return {self.strings[owner]: found
+                for index, found in offsets.items()
+                for owner in self.owners[index]}
@@ -0,0 +1,278 @@
+"""
+Defines `Scheduler`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import json
+import logging
+import os
+import sys
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Scheduler(ABC):
+    """
+    Define the object responsible for admitting files by predicted memory.
+
+    A worker pool sized by processors alone falls over as soon as a few
+    huge files land in it at once. Instead, the memory each file will take
+    to parse is predicted from its size, and a file is only handed to a
+    worker while the resident memory of every live worker, plus the
+    prediction for every file in progress, itself included, stays under
+    the limit. A single file is always admitted when nothing else is in
+    progress, however large its prediction.
+
+    A worker counts with the resident memory it last reported, and one
+    which has yet to report with the most any worker of the run has
+    reported. Before any has, the figure persisted by the runs before is
+    assumed, or else `DEFAULT_WORKER_RSS`.
+
+    The prediction is a straight line through the memory files actually
+    took, fitted by least squares and raised by `MARGIN`. Workers report
+    the peak memory of every file they parse, and the most recent
+    `MAX_SAMPLES` of them are persisted to `MODEL_PATH` whenever memory is
+    limited, so that each such run starts out calibrated by the runs before
+    it. Until `MIN_SAMPLES` have been gathered, `DEFAULT_BASE` and
+    `DEFAULT_RATIO` are assumed.
+
+    On Linux the peak of each file is exact, as the peak of the worker is
+    reset before every file. Elsewhere a file only counts as a sample when
+    it raised the peak of its worker.
+    """
+
+    MODEL_PATH = os.getcwd() + "/out/memory-model.json"
+    MAX_SAMPLES = 512
+    MIN_SAMPLES = 8
+    MARGIN = 1.25
+    DEFAULT_BASE = 64 << 20
+    DEFAULT_RATIO = 200.0
+    DEFAULT_WORKER_RSS = 64 << 20
+
+    def __init__(self, limit: int = None, model_path: str = None) -> None:
+        """
+        Initialize the `Scheduler` object, loading a persisted calibration
+        when memory is limited.
+
+        `self.samples` holds a [file size, bytes used] pair per file parsed,
+        `self.base` and `self.ratio` the line fitted through them, and
+        `self.reserved` the prediction of each file in progress.
+
+        `self.resident` holds the resident bytes of each live worker, and
+        `self.worker_rss` those assumed of a worker which has yet to
+        report, which `self.reported` tells whether this run has measured.
+
+        :param limit: bytes the live workers and predictions in progress may
+            add up to, unlimited if None
+        :param model_path: calibration file, `MODEL_PATH` by default
+        :return: returns nothing
+        """
+        self.limit = limit
+        self.model_path = model_path or self.MODEL_PATH
+        self.samples = []
+        self.reserved = {}
+        self.resident = {}
+        self.worker_rss = self.DEFAULT_WORKER_RSS
+        self.reported = False
+        self.base = self.DEFAULT_BASE
+        self.ratio = self.DEFAULT_RATIO
+
+        # An unlimited scheduler admits everything, so it has no use for a
+        # calibration, and neither loads nor persists one
+        if limit and os.path.isfile(self.model_path):
+            try:
+                with open(self.model_path) as infile:
+                    model = json.load(infile)
+
+                self.samples = model["samples"]
+                self.worker_rss = model.get("worker_rss", self.worker_rss)
+
+            except (OSError, ValueError, KeyError) as err:
+                LOGGER.warning("Ignoring memory model %s: %s",
+                               self.model_path, err)
+
+        self.fit()
+
+    def fit(self) -> None:
+        """
+        Fit the prediction to the samples gathered so far.
+
+        :return: returns nothing
+        """
+        count = len(self.samples)
+        if count < self.MIN_SAMPLES:
+            return
+
+        mean_size = sum(size for size, _ in self.samples) / count
+        mean_used = sum(used for _, used in self.samples) / count
+        spread = sum((size - mean_size) ** 2 for size, _ in self.samples)
+
+        # Files all of the same size say nothing about the slope, which is
+        # then left as it was
+        if spread:
+            self.ratio = max(0.0, sum(
+                (size - mean_size) * (used - mean_used)
+                for size, used in self.samples) / spread)
+
+        self.base = max(0.0, mean_used - self.ratio * mean_size)
+
+    def predict(self, size: int) -> int:
+        """
+        Predict the memory a file takes to parse.
+
+        :param size: size of the file in bytes
+        :return int: predicted bytes
+        """
+        return int((self.base + self.ratio * size) * self.MARGIN)
+
+    def admits(self, predicted: int, new_worker: bool = False) -> bool:
+        """
+        Check whether a file fits in alongside those in progress.
+
+        :param predicted: predicted bytes of the file
+        :param new_worker: whether a worker has to be started for the file
+        :return bool: True if the file may be handed out
+        """
+        if not self.limit or not self.reserved:
+            return True
+
+        used = sum(self.resident.values()) + sum(self.reserved.values())
+        if new_worker:
+            used += self.worker_rss
+
+        return used + predicted <= self.limit
+
+    def track(self, key, rss: int = None) -> None:
+        """
+        Account for the resident memory of a live worker.
+
+        :param key: anything identifying the worker
+        :param rss: resident bytes the worker reported, or None for a
+            worker which has yet to report
+        :return: returns nothing
+        """
+        if rss is None:
+            rss = self.worker_rss
+        else:
+            self.worker_rss = max(self.worker_rss, rss) if self.reported \
+                else rss
+            self.reported = True
+
+        self.resident[key] = rss
+
+    def forget(self, key) -> None:
+        """
+        Stop accounting for a worker once it has exited.
+
+        :param key: anything identifying the worker
+        :return: returns nothing
+        """
+        self.resident.pop(key, None)
+
+    def reserve(self, key, predicted: int) -> None:
+        """
+        Account for a file handed out.
+
+        :param key: anything identifying the file's worker
+        :param predicted: predicted bytes of the file
+        :return: returns nothing
+        """
+        self.reserved[key] = predicted
+
+    def release(self, key) -> None:
+        """
+        Stop accounting for a file once its worker is done with it.
+
+        :param key: anything identifying the file's worker
+        :return: returns nothing
+        """
+        self.reserved.pop(key, None)
+
+    def observe(self, size: int, used: int) -> None:
+        """
+        Calibrate the prediction with the memory a file actually took.
+
+        :param size: size of the file in bytes
+        :param used: bytes the file took to parse
+        :return: returns nothing
+        """
+        self.samples.append([size, used])
+        del self.samples[:-self.MAX_SAMPLES]
+        self.fit()
+
+    def save(self) -> None:
+        """
+        Persist the samples for later runs to start out calibrated.
+
+        :return: returns nothing
+        """
+        directory = os.path.dirname(self.model_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.model_path + ".tmp", "w") as outfile:
+            json.dump({"samples": self.samples,
+                       "worker_rss": self.worker_rss}, outfile)
+        os.replace(self.model_path + ".tmp", self.model_path)
+
+        LOGGER.info("Memory model: %d bytes per worker, %.0f bytes plus %.1f "
+                    "per byte of source, from %d samples", self.worker_rss,
+                    self.base, self.ratio, len(self.samples))
+
+    @staticmethod
+    def reset_peak() -> bool:
+        """
+        Reset the peak resident set size of the calling process.
+
+        :return bool: True if the peak was reset, which only Linux supports
+        """
+        try:
+            with open("/proc/self/clear_refs", "w") as outfile:
+                outfile.write("5")
+            return True
+
+        except OSError:
+            return False
+
+    @staticmethod
+    def peak_rss() -> int:
+        """
+        Measure the peak resident set size of the calling process.
+
+        :return int: bytes, or 0 where it cannot be measured
+        """
+        # Only the peak of /proc is affected by `reset_peak`
+        try:
+            with open("/proc/self/status") as infile:
+                for line in infile:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) << 10
+
+        except (OSError, ValueError, IndexError):
+            pass
+
+        try:
+            import resource
+        except ImportError:
+            return 0
+
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+    @classmethod
+    def current_rss(cls) -> int:
+        """
+        Measure the resident set size of the calling process.
+
+        :return int: bytes, or the peak where only that can be measured
+        """
+        try:
+            with open("/proc/self/statm") as infile:
+                return int(infile.read().split()[1]) * os.sysconf(
+                    "SC_PAGE_SIZE")
+
+        except (OSError, ValueError, IndexError, AttributeError):
+            return cls.peak_rss()
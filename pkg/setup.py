@@ -48,12 +48,29 @@ SETUP_INFO = dict(
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
 
-    packages=["astparser",
+    packages=["api",
+              "astparser",
+              "bench",
+              "bloom",
+              "clangjson",
               "core",
               "exception",
+              "funccache",
               "interface",
+              "keyindex",
+              "logger",
+              "metrics",
+              "partial",
+              "prescan",
+              "progress",
               "record",
-              "verifier"],
+              "scanner",
+              "scheduler",
+              "stoplist",
+              "store",
+              "supervisor",
+              "verifier",
+              "watcher"],
 
     zip_safe=True
 )
@@ -0,0 +1,171 @@
+"""
+Defines `Stoplist`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import collections
+import hashlib
+import json
+import logging
+import os
+from abc import ABC
+
+from metrics.metrics import Metrics
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Stoplist(ABC):
+    """
+    Define the object responsible for dropping known-common strings.
+
+    Most occurrences of a corpus are strings such as "%s\\n" or "error",
+    which never make it into the bundle as they are anything but unique.
+    A stoplist built from the events or partial results of previous runs
+    holds every string which occurred at least a given number of times,
+    and such strings are dropped the moment they are extracted, before
+    they take up any memory or uniqueness checking at all.
+
+    A stoplist file is `MAGIC` followed by the sorted `DIGEST_SIZE` byte
+    blake2b digest of each string. `DEFAULT_PATH` is used whenever it
+    exists, unless a run asks for another stoplist or none at all.
+
+    Dropping a string which occurred more than once in a previous run
+    leaves the bundle of the same corpus unchanged. Should a corpus lose
+    all but one occurrence of a string, that string is lost rather than
+    reported as unique, which is why exact runs can do without.
+
+    `digests` holds the digests of the loaded stoplist, and `fingerprint`
+    the digest of its file, empty while none is loaded.
+    """
+
+    MAGIC = b"IDACFPSL"
+    DIGEST_SIZE = 8
+    DEFAULT_PATH = os.getcwd() + "/out/stoplist.bin"
+    MIN_COUNT = 10
+
+    digests = frozenset()
+    fingerprint = ""
+
+    @classmethod
+    def digest(cls, string: str) -> bytes:
+        """
+        Hash a string to the digest it is stored under.
+
+        :param string: string as extracted
+        :return bytes: digest of `DIGEST_SIZE` bytes
+        """
+        return hashlib.blake2b(string.encode("utf-8", "surrogatepass"),
+                               digest_size=cls.DIGEST_SIZE).digest()
+
+    @classmethod
+    def drops(cls, string: str) -> bool:
+        """
+        Check whether an extracted string is to be dropped.
+
+        :param string: string as extracted
+        :return bool: True if the string is on the loaded stoplist
+        """
+        if not cls.digests or cls.digest(string) not in cls.digests:
+            return False
+
+        Metrics.count("strings_stoplisted_total")
+        return True
+
+    @classmethod
+    def load(cls, file_path: str = None) -> None:
+        """
+        Load a stoplist, replacing any loaded before.
+
+        :param file_path: stoplist to load, `DEFAULT_PATH` by default
+        :return: returns nothing
+        """
+        file_path = file_path or cls.DEFAULT_PATH
+
+        with open(file_path, "rb") as infile:
+            data = infile.read()
+
+        if not data.startswith(cls.MAGIC) or \
+                (len(data) - len(cls.MAGIC)) % cls.DIGEST_SIZE:
+            raise ValueError("Not a stoplist: " + file_path)
+
+        cls.digests = frozenset(
+            data[start:start + cls.DIGEST_SIZE]
+            for start in range(len(cls.MAGIC), len(data), cls.DIGEST_SIZE))
+        cls.fingerprint = hashlib.blake2b(data, digest_size=16).hexdigest()
+
+        LOGGER.info("Loaded stoplist of %d strings from %s",
+                    len(cls.digests), file_path)
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Stop dropping any string.
+
+        :return: returns nothing
+        """
+        cls.digests = frozenset()
+        cls.fingerprint = ""
+
+    @staticmethod
+    def count_strings(file_paths: list) -> collections.Counter:
+        """
+        Count the occurrences of every string in events or partials.
+
+        Both are one json value per line: an object per occurrence for
+        events, and an array of [string, count, function] for partials.
+
+        :param file_paths: NDJSON events or partial results
+        :return counts: counter of string: occurrences
+        """
+        counts = collections.Counter()
+
+        for file_path in file_paths:
+            with open(file_path, encoding="utf-8") as infile:
+                for line in infile:
+                    value = json.loads(line)
+
+                    if isinstance(value, list):
+                        counts[value[0]] += value[1]
+                    else:
+                        counts[value["string"]] += 1
+
+        return counts
+
+    @classmethod
+    def build(cls, file_paths: list, file_path: str = None,
+              min_count: int = None) -> int:
+        """
+        Build a stoplist from the events or partials of previous runs.
+
+        :param file_paths: NDJSON events or partial results
+        :param file_path: stoplist to write, `DEFAULT_PATH` by default
+        :param min_count: occurrences which put a string on the stoplist,
+            `MIN_COUNT` by default
+        :return count: number of strings on the stoplist
+        """
+        file_path = file_path or cls.DEFAULT_PATH
+        min_count = min_count or cls.MIN_COUNT
+
+        counts = cls.count_strings(file_paths)
+        digests = sorted({cls.digest(string)
+                          for string, count in counts.items()
+                          if count >= min_count})
+
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Written whole to a temporary file first, so that a run starting
+        # meanwhile never loads half a stoplist
+        with open(file_path + ".tmp", "wb") as outfile:
+            outfile.write(cls.MAGIC)
+            outfile.writelines(digests)
+        os.replace(file_path + ".tmp", file_path)
+
+        LOGGER.info("Stoplisted %d of %d strings occurring at least %d "
+                    "times", len(digests), len(counts), min_count)
+
+        return len(digests)
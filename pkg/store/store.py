@@ -0,0 +1,167 @@
+"""
+Defines `Store`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import sqlite3
+from abc import ABC
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Store(ABC):
+    """
+    Define the object responsible for keeping occurrences in SQLite.
+
+    `Store` is the on-disk alternative to the `Record` list of tuples for
+    corpora too large to keep in memory. Every occurrence is inserted into
+    a single indexed table, and uniqueness is decided by a query instead
+    of by the in-memory list. The database persists between runs, so it
+    can be extended over several runs and queried ad hoc.
+
+    `BATCH_SIZE` is the number of rows inserted per transaction. Committing
+    is by far the most expensive part of an insert in SQLite.
+    """
+
+    BATCH_SIZE = 50000
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS occurrences ("
+        "file TEXT NOT NULL, function TEXT NOT NULL, string TEXT NOT NULL, "
+        "line INTEGER, column INTEGER)",
+        "CREATE INDEX IF NOT EXISTS occurrences_string "
+        "ON occurrences (string)",
+        "CREATE INDEX IF NOT EXISTS occurrences_function "
+        "ON occurrences (function)",
+        "CREATE INDEX IF NOT EXISTS occurrences_file "
+        "ON occurrences (file)",
+    )
+
+    # A string is unique when it occurs exactly once across the corpus,
+    # exactly as it is for the in-memory `Record`. Ordering by string lets
+    # the bundle be written straight from the cursor in its final order
+    UNIQUE_QUERY = (
+        "SELECT string, MIN(function) FROM occurrences "
+        "GROUP BY string HAVING COUNT(*) = 1 ORDER BY string")
+
+    # Everything a mergeable partial result needs to know about a string
+    SUMMARY_QUERY = (
+        "SELECT string, COUNT(*), "
+        "CASE WHEN COUNT(*) = 1 THEN MIN(function) END "
+        "FROM occurrences GROUP BY string ORDER BY string")
+
+    # Strings dropped from the bundle for occurring more than once
+    TOMBSTONED_QUERY = (
+        "SELECT COUNT(*) FROM (SELECT string FROM occurrences "
+        "GROUP BY string HAVING COUNT(*) > 1)")
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Initialize the `Store` object, creating the database if needed.
+
+        `self._pending` holds the rows waiting to be inserted, and
+        `self._uncommitted` the number of rows inserted since the last
+        commit.
+
+        :param db_path: path of the SQLite database
+        :return: returns nothing
+        """
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._pending = []
+        self._uncommitted = 0
+
+        # Durability of every single batch is not required, a run which
+        # dies half way through is simply run again
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def replace_file(self, file_path: str, occurrences: list) -> None:
+        """
+        Replace every stored occurrence of a file.
+
+        Re-processing a file that is already in the database must not
+        count its strings twice, so its previous rows are deleted first.
+
+        :param file_path: file the occurrences were found in
+        :param occurrences: list of tuples in the format
+            (function, string, line, column)
+        :return: returns nothing
+        """
+        # Rows of the same file may still be waiting to be inserted
+        self._insert_pending()
+        self._conn.execute("DELETE FROM occurrences WHERE file = ?",
+                           (file_path,))
+
+        self._pending.extend((file_path, func, string, line, column)
+                             for func, string, line, column in occurrences)
+
+        if len(self._pending) + self._uncommitted >= self.BATCH_SIZE:
+            self.commit()
+
+    def commit(self) -> None:
+        """
+        Insert every pending row and commit the current transaction.
+
+        :return: returns nothing
+        """
+        self._insert_pending()
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def _insert_pending(self) -> None:
+        """
+        Insert every pending row without committing.
+
+        :return: returns nothing
+        """
+        if not self._pending:
+            return
+
+        self._conn.executemany(
+            "INSERT INTO occurrences VALUES (?, ?, ?, ?, ?)", self._pending)
+        self._uncommitted += len(self._pending)
+        self._pending = []
+
+    def unique_pairs(self):
+        """
+        Iterate the unique strings and their functions, ordered by string.
+
+        :return: cursor of tuples in the format (string, function)
+        """
+        self.commit()
+        return self._conn.execute(self.UNIQUE_QUERY)
+
+    def string_summaries(self):
+        """
+        Iterate how often each string occurs, ordered by string.
+
+        :return: cursor of tuples in the format (string, count, function)
+        """
+        self.commit()
+        return self._conn.execute(self.SUMMARY_QUERY)
+
+    def count_tombstoned(self) -> int:
+        """
+        Count the strings which occur more than once.
+
+        :return int: number of strings left out of the bundle
+        """
+        self.commit()
+        return self._conn.execute(self.TOMBSTONED_QUERY).fetchone()[0]
+
+    def close(self) -> None:
+        """
+        Commit anything outstanding and close the database.
+
+        :return: returns nothing
+        """
+        self.commit()
+        self._conn.close()
@@ -0,0 +1,438 @@
+"""
+Defines `Supervisor`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import collections
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+from abc import ABC
+
+from metrics.metrics import Metrics
+from scheduler.scheduler import Scheduler
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Supervisor(ABC):
+    """
+    Define the object responsible for isolating each file in a worker.
+
+    Every file is extracted by one of a pool of worker processes, each
+    under a time limit and a memory cap. A file which fails, runs out of
+    time or memory, or takes its worker down with it is recorded as a
+    failure instead of aborting the run, and is retried once. A worker
+    which overran its time is killed and replaced, so the throughput of
+    the rest of the corpus does not depend on its worst file.
+
+    Files are handed out as the `Scheduler` admits them, largest first
+    when their memory is limited, and smaller files may overtake one which
+    does not fit yet. Workers are only started once a file is admitted for
+    them, as their own resident memory counts towards the limit too. They
+    are replaced after a number of files, or once their resident memory has
+    grown past a threshold, as the allocator rarely hands fragmented memory
+    back.
+
+    `MAX_ATTEMPTS` is the number of times a file is tried in total, and
+    `LOOKAHEAD` the number of waiting files considered when the first one
+    does not fit.
+    """
+
+    MAX_ATTEMPTS = 2
+    LOOKAHEAD = 64
+
+    def __init__(self, jobs: int = 1, timeout: float = None,
+                 memory_cap: int = None, frontend: str = "pycparser",
+                 stoplist_path: str = None, scheduler: Scheduler = None,
+                 max_tasks: int = None, max_rss: int = None) -> None:
+        """
+        Initialize the `Supervisor` object.
+
+        `self.failures` holds one entry per file which failed every one of
+        its attempts, and `self.succeeded` the number of files which did
+        not.
+
+        :param jobs: number of worker processes
+        :param timeout: seconds each file may take, unlimited if None
+        :param memory_cap: bytes of address space per worker, if any
+        :param frontend: frontend the workers parse files with
+        :param stoplist_path: stoplist the workers load, if any
+        :param scheduler: admits files by predicted memory, an unlimited
+            `Scheduler` which only calibrates by default
+        :param max_tasks: files after which a worker is replaced, if any
+        :param max_rss: resident bytes past which a worker is replaced, if
+            any
+        :return: returns nothing
+        """
+        self.jobs = max(1, jobs)
+        self.timeout = timeout
+        self.memory_cap = memory_cap
+        self.frontend = frontend
+        self.stoplist_path = stoplist_path
+        self.scheduler = scheduler or Scheduler()
+        self.max_tasks = max_tasks
+        self.max_rss = max_rss
+        self.failures = []
+        self.succeeded = 0
+
+    @staticmethod
+    def worker_main(conn, log_queue, log_level: int, memory_cap: int,
+                    frontend: str, stoplist_path: str = None) -> None:
+        """
+        Extract the files sent by the supervisor until told to stop.
+
+        Runs inside each worker process. Every file results in exactly one
+        message back: ("ok", occurrences, timings, usage) or ("error",
+        type, message, usage), where timings are the seconds taken by each
+        stage and usage holds the resident bytes of the worker afterwards
+        and the peak bytes the file took, if known.
+
+        :param conn: worker end of the pipe to the supervisor
+        :param log_queue: queue of the parent's logging writer, if any
+        :param log_level: level of the worker's root logger
+        :param memory_cap: bytes of address space, if any
+        :param frontend: frontend files are parsed with
+        :param stoplist_path: stoplist to load, if any
+        :return: returns nothing
+        """
+        from logger.logger import Logger
+
+        Logger.worker_init(log_queue, log_level)
+
+        if memory_cap:
+            try:
+                import resource
+                resource.setrlimit(resource.RLIMIT_AS,
+                                   (memory_cap, memory_cap))
+            except (ImportError, ValueError, OSError) as err:
+                LOGGER.warning("Memory cap not applied: %s", err)
+
+        from interface.interface import Interface
+        from astparser.astparser import AstParser
+        from exception.exception import NoFunctionsFoundError
+        from stoplist.stoplist import Stoplist
+
+        # Workers need not have been forked, and so cannot count on the
+        # stoplist of the parent being loaded already
+        if stoplist_path:
+            Stoplist.load(stoplist_path)
+
+        intr = Interface()
+        astp = AstParser()
+        clang = None
+        if frontend == "clang-json":
+            from clangjson.clangjson import ClangJson
+
+            clang = ClangJson()
+
+        while True:
+            file_path = conn.recv()
+            if file_path is None:
+                return
+
+            reset = Scheduler.reset_peak()
+            resident = Scheduler.current_rss()
+            peak = Scheduler.peak_rss()
+
+            try:
+                start = time.perf_counter()
+
+                if clang:
+                    occurrences = clang.extract_occurrences(file_path)
+                    timings = {"parse": time.perf_counter() - start}
+                else:
+                    ast = intr.load_new_ast(file_path)
+                    parsed = time.perf_counter()
+                    occurrences = astp.extract_occurrences(ast)
+                    timings = {"parse": parsed - start,
+                               "extract": time.perf_counter() - parsed}
+
+                reply = ("ok", occurrences, timings)
+
+            except NoFunctionsFoundError:
+                reply = ("ok", [], {})
+
+            # Anything at all a single file can raise, including running
+            # out of memory, is reported rather than ending the worker. The
+            # reply is only sent once the except clause has released the
+            # traceback, and with it whatever memory the file held on to
+            except Exception as err:
+                astp = AstParser()
+                reply = ("error", type(err).__name__, str(err))
+
+            # Without a reset, a peak left over from an earlier file says
+            # nothing about this one
+            new_peak = Scheduler.peak_rss()
+            used = new_peak - resident if reset or new_peak > peak else None
+
+            conn.send(reply + ({"rss": Scheduler.current_rss(),
+                                "used": used},))
+
+    def start_worker(self) -> tuple:
+        """
+        Start a new worker process.
+
+        :return worker: tuple of (process, supervisor end of the pipe)
+        """
+        from logger.logger import Logger
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=Supervisor.worker_main,
+            args=(child_conn, Logger.queue, logging.getLogger().level,
+                  self.memory_cap, self.frontend, self.stoplist_path),
+            daemon=True)
+        process.start()
+        child_conn.close()
+
+        return process, parent_conn
+
+    def run(self, file_paths: list, started=None):
+        """
+        Extract every file in the worker pool.
+
+        Results are yielded in the order files complete, which is not
+        necessarily the order they were given in. A file which failed for
+        good is yielded with None in place of its occurrences.
+
+        :param file_paths: files to be extracted
+        :param started: optional callable, called with each file handed out
+        :return: generator of tuples in the format (file path, occurrences)
+        """
+        sizes = {file_path: self.file_size(file_path)
+                 for file_path in file_paths}
+
+        # The largest files go first, rather than last, where they would
+        # hold up the end of the run
+        if self.scheduler.limit:
+            file_paths = sorted(file_paths, key=sizes.get, reverse=True)
+
+        pending = collections.deque((file_path, 1) for file_path in file_paths)
+        idle = []
+        busy = {}
+        served = {}
+
+        try:
+            while pending or busy:
+                while pending and (idle or len(busy) < self.jobs):
+                    index = self.admit(pending, sizes, not idle)
+                    if index is None:
+                        break
+
+                    file_path, attempt = pending[index]
+                    del pending[index]
+
+                    if idle:
+                        process, conn = idle.pop()
+                    else:
+                        process, conn = self.start_worker()
+                        self.scheduler.track(conn)
+
+                    conn.send(file_path)
+                    if started:
+                        started(file_path)
+                    self.scheduler.reserve(
+                        conn, self.scheduler.predict(sizes[file_path]))
+                    busy[conn] = (process, file_path, attempt,
+                                  time.monotonic())
+
+                ready = multiprocessing.connection.wait(
+                    list(busy), self.next_deadline(busy))
+
+                for conn in ready:
+                    process, file_path, attempt, _ = busy.pop(conn)
+                    self.scheduler.release(conn)
+
+                    try:
+                        message = conn.recv()
+
+                    # The worker died without answering, most likely
+                    # killed by the operating system
+                    except EOFError:
+                        process.join()
+                        message = ("error", "WorkerCrash", "exit code %s" %
+                                   process.exitcode)
+                        served.pop(conn, None)
+                        self.scheduler.forget(conn)
+                        conn.close()
+
+                    else:
+                        usage = message[3]
+                        if message[0] == "ok" and usage["used"] is not None:
+                            self.scheduler.observe(sizes[file_path],
+                                                   usage["used"])
+                        self.scheduler.track(conn, usage["rss"])
+
+                        served[conn] = served.get(conn, 0) + 1
+                        if self.worn_out(served[conn], usage["rss"]):
+                            LOGGER.debug("Retiring worker after %d files "
+                                         "at %d bytes", served.pop(conn),
+                                         usage["rss"])
+                            self.scheduler.forget(conn)
+                            self.retire(process, conn)
+                        else:
+                            idle.append((process, conn))
+
+                    if message[0] == "ok":
+                        for stage, seconds in message[2].items():
+                            Metrics.observe(stage, seconds)
+
+                        self.succeeded += 1
+                        yield file_path, message[1]
+                    elif self.fail(pending, file_path, attempt, message[1],
+                                   message[2]):
+                        yield file_path, None
+
+                for conn in self.overdue(busy):
+                    process, file_path, attempt, _ = busy.pop(conn)
+                    self.scheduler.release(conn)
+                    self.scheduler.forget(conn)
+                    served.pop(conn, None)
+
+                    # A worker stuck in a file cannot be interrupted, only
+                    # replaced, which happens once a file is admitted for
+                    # its successor
+                    process.kill()
+                    process.join()
+                    conn.close()
+
+                    if self.fail(pending, file_path, attempt, "Timeout",
+                                 "exceeded %s seconds" % self.timeout):
+                        yield file_path, None
+
+        finally:
+            for process, conn in idle:
+                conn.send(None)
+                conn.close()
+            for conn, (process, _, _, _) in busy.items():
+                process.kill()
+                conn.close()
+
+            self.scheduler.reserved.clear()
+            self.scheduler.resident.clear()
+            if self.scheduler.limit:
+                self.scheduler.save()
+
+    @staticmethod
+    def file_size(file_path: str) -> int:
+        """
+        Measure the size of a file, which predicts its memory.
+
+        :param file_path: file to measure
+        :return int: bytes, or 0 if the file cannot be found
+        """
+        try:
+            return os.path.getsize(file_path)
+        except OSError:
+            return 0
+
+    def admit(self, pending: collections.deque, sizes: dict,
+              new_worker: bool = False) -> int:
+        """
+        Pick the next waiting file the `Scheduler` admits.
+
+        :param pending: queue of (file, attempt) still to be extracted
+        :param sizes: dictionary of file path: bytes
+        :param new_worker: whether a worker has to be started for the file
+        :return index: position of the file within the queue, or None if
+            none of the files considered fit
+        """
+        for index in range(min(len(pending), self.LOOKAHEAD)):
+            predicted = self.scheduler.predict(sizes[pending[index][0]])
+            if self.scheduler.admits(predicted, new_worker):
+                return index
+
+        return None
+
+    def worn_out(self, served: int, rss: int) -> bool:
+        """
+        Check whether a worker is due to be replaced.
+
+        :param served: files the worker has extracted
+        :param rss: resident bytes of the worker
+        :return bool: True if the worker should be replaced
+        """
+        return bool(self.max_tasks and served >= self.max_tasks or
+                    self.max_rss and rss >= self.max_rss)
+
+    @staticmethod
+    def retire(process, conn) -> None:
+        """
+        Stop an idle worker and wait for it to exit.
+
+        :param process: worker process
+        :param conn: supervisor end of the pipe to the worker
+        :return: returns nothing
+        """
+        conn.send(None)
+        conn.close()
+        process.join()
+
+    def next_deadline(self, busy: dict) -> float:
+        """
+        Compute how long to wait for the first worker to overrun its time.
+
+        :param busy: dictionary of connection: (process, file, attempt, start)
+        :return seconds: seconds until the next deadline, None if unlimited
+        """
+        if not self.timeout:
+            return None
+
+        first_start = min(start for _, _, _, start in busy.values())
+        return max(0.0, first_start + self.timeout - time.monotonic())
+
+    def overdue(self, busy: dict) -> list:
+        """
+        Collect the workers which have overrun their time.
+
+        :param busy: dictionary of connection: (process, file, attempt, start)
+        :return conns: connections of the overdue workers
+        """
+        if not self.timeout:
+            return []
+
+        now = time.monotonic()
+        return [conn for conn, (_, _, _, start) in busy.items()
+                if now - start >= self.timeout]
+
+    def fail(self, pending: collections.deque, file_path: str, attempt: int,
+             error: str, message: str) -> bool:
+        """
+        Retry a failed file, or record it as failed for good.
+
+        :param pending: queue of (file, attempt) still to be extracted
+        :param file_path: file which failed
+        :param attempt: attempt which failed, starting at 1
+        :param error: name of the error
+        :param message: description of the error
+        :return bool: True if the file failed for good
+        """
+        if attempt < self.MAX_ATTEMPTS:
+            LOGGER.warning("Retrying %s after %s: %s", file_path, error,
+                           message)
+            pending.append((file_path, attempt + 1))
+            return False
+
+        LOGGER.error("Giving up on %s after %s: %s", file_path, error,
+                     message)
+        self.failures.append({"file": file_path, "error": error,
+                              "message": message, "attempts": attempt})
+        return True
+
+    def write_report(self, file_path: str) -> None:
+        """
+        Write the machine-readable report of every failed file.
+
+        :param file_path: path of the json report
+        :return: returns nothing
+        """
+        with open(file_path, "w") as outfile:
+            json.dump({"succeeded": self.succeeded,
+                       "failed": len(self.failures),
+                       "failures": self.failures}, outfile, indent=4)
@@ -7,7 +7,6 @@ convention.
 
 import logging
 from abc import ABC
-from pathlib import Path
 
 from exception.exception import DirStatusError, \
     BundleCreationError, NoFunctionsFoundError, \
@@ -25,8 +24,33 @@ class Verifier(ABC):
     as class static methods. Only in two different cases does the class
     have a return value other than None; checking the dictionary functions
     and comparing the list and dictionary.
+
+    `level` controls how much checking is performed on the hot path. At
+    `VALIDATE_OFF` the per-function checks and their logging are skipped
+    entirely, `VALIDATE_BASIC` performs only the constant-time checks and
+    `VALIDATE_FULL` additionally logs every function that is found.
     """
 
+    VALIDATE_OFF = "off"
+    VALIDATE_BASIC = "basic"
+    VALIDATE_FULL = "full"
+    LEVELS = (VALIDATE_OFF, VALIDATE_BASIC, VALIDATE_FULL)
+
+    level = VALIDATE_FULL
+
+    @classmethod
+    def set_level(cls, level: str) -> None:
+        """
+        Set the validation level used by every subsequent check.
+
+        :param level: one of `Verifier.LEVELS`
+        :return: returns nothing
+        """
+        if level not in cls.LEVELS:
+            raise ValueError("Unknown validation level: %s" % level)
+
+        cls.level = level
+
     @staticmethod
     def check_parsable(files: list) -> None:
         """
@@ -53,8 +77,8 @@ class Verifier(ABC):
             if not file_io.name:
                 raise FileLocationError("File has no name property")
 
-    @staticmethod
-    def check_num_ast_functions(nodes) -> None:
+    @classmethod
+    def check_num_ast_functions(cls, nodes) -> None:
         """
         Count the number of functions found within a set of nodes or full AST.
 
@@ -64,19 +88,43 @@ class Verifier(ABC):
         :param nodes: list of function declaration nodes
         :return: returns nothing
         """
-        count = 0
+        # Each function definition node (from c_ast.NodeVisitor) contains
+        # specific properties, one of which being name
+        cls.check_functions(nodes, lambda node: node.decl.name)
 
-        for node in nodes:
-            count = count + 1
+    @classmethod
+    def check_num_function_names(cls, names: list) -> None:
+        """
+        Count the number of functions a frontend other than PycParser found.
 
-            # Each function definition node (from c_ast.NodeVisitor) contains
-            # specific properties, one of which being name. More info here at
-            # https://docs.python.org/3/library/ast.html
-            LOGGER.info('Function: %s', node.decl.name)
+        :param names: list of function names
+        :return: returns nothing
+        """
+        cls.check_functions(names, str)
 
-        if not count:
+    @classmethod
+    def check_functions(cls, functions: list, name_of) -> None:
+        """
+        Count the functions a frontend found, whatever it represents them
+        with.
+
+        :param functions: list of functions, as the frontend found them
+        :param name_of: callable returning the name of a function
+        :return: returns nothing
+        """
+        if cls.level == cls.VALIDATE_OFF:
+            return
+
+        if not functions:
             raise NoFunctionsFoundError("No functions found in target file")
 
+        # Walking every function just to log its name is only worth doing
+        # when the records will actually be emitted somewhere
+        if cls.level == cls.VALIDATE_FULL and \
+                LOGGER.isEnabledFor(logging.INFO):
+            for function in functions:
+                LOGGER.info('Function: %s', name_of(function))
+
     @staticmethod
     def check_num_dict_functions(tmp_dict: dict) -> bool:
         """
@@ -90,8 +138,8 @@ class Verifier(ABC):
         """
         return bool(tmp_dict.values())
 
-    @staticmethod
-    def check_dict_by_list(tmp_list: list, tmp_dict: dict) -> list:
+    @classmethod
+    def check_dict_by_list(cls, tmp_list: list, tmp_dict: dict) -> list:
         """
         Locate common denominators between tuple list and dictionary keys.
 
@@ -102,22 +150,20 @@ class Verifier(ABC):
         :param tmp_dict: master dictionary of unique strings: functions
         :return: list
         """
-        to_remove = []
-
-        for key in tmp_dict.keys():
-            for pair in tmp_list:
+        if cls.level == cls.VALIDATE_OFF:
+            return []
 
-                # Key must not already be in the list. If it is, appending
-                # it will create a duplicate in the to_remove list
-                if key == pair[1] and key not in to_remove:
+        # Collecting the second item of each (function, string) tuple into a
+        # set turns the membership test into a constant-time lookup, rather
+        # than a walk of the whole list for every dictionary key
+        strings = {pair[1] for pair in tmp_list}
 
-                    # Add the second item in the tuple: (function, string)
-                    to_remove.append(pair[1])
+        # Dictionary keys are already unique, so the result preserves the
+        # key order without needing any de-duplication
+        return [key for key in tmp_dict if key in strings]
 
-        return to_remove
-
-    @staticmethod
-    def check_list_dict_conversion(tmp_list: list) -> None:
+    @classmethod
+    def check_list_dict_conversion(cls, tmp_list: list) -> None:
         """
         Check if the list of tuples can be converted to a custom dictionary.
 
@@ -128,6 +174,9 @@ class Verifier(ABC):
         :param tmp_list: list of tuples
         :return: returns nothing
         """
+        if cls.level == cls.VALIDATE_OFF:
+            return
+
         try:
             if not tmp_list:
                 raise ListDictConversionError()
@@ -135,8 +184,8 @@ class Verifier(ABC):
         except ListDictConversionError:
             LOGGER.warning("Empty list when converting to final dictionary")
 
-    @staticmethod
-    def check_bundle_creation(out_path_dir: str, out_path: str) -> None:
+    @classmethod
+    def check_bundle_creation(cls, out_path_dir: str, out_path: str) -> None:
         """
         Test out/ directory and bundle file creation.
 
@@ -144,6 +193,12 @@ class Verifier(ABC):
         :param out_path: fully qualified path to the json bundle
         :return: returns nothing
         """
+        if cls.level == cls.VALIDATE_OFF:
+            return
+
+        # Only needed once a bundle is written, and slow to import
+        from pathlib import Path
+
         out_dir = Path(out_path_dir)
         out_file = Path(out_path)
 
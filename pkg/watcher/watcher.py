@@ -0,0 +1,198 @@
+"""
+Defines `Watcher`.
+
+Instantiates the module-level logger with the appropriate naming
+convention.
+"""
+
+import logging
+import os
+import subprocess
+import time
+from abc import ABC
+from pycparser import c_parser
+
+from interface.interface import Interface
+from astparser.astparser import AstParser
+from funccache.funccache import FuncCache
+from record.record import Record
+from exception.exception import CustomBaseError, NoFunctionsFoundError
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Watcher(ABC):
+    """
+    Define the object responsible for keeping the bundle current.
+
+    `Watcher` polls a directory tree for C files which were added, changed
+    or removed since the last poll. Only those files are re-extracted, and
+    their contributions are swapped into the incremental `Record` state,
+    so that each update costs time proportional to the change rather than
+    to the whole corpus.
+
+    `EXTENSION` is the file extension of the files that are watched.
+
+    `POLL_INTERVAL` is the number of seconds slept between polls, and
+    `DEBOUNCE` the number of seconds without any further change that must
+    pass before the bundle is rewritten. Saving a file in most editors
+    triggers several writes in quick succession.
+    """
+
+    EXTENSION = ".c"
+    POLL_INTERVAL = 0.5
+    DEBOUNCE = 1.0
+
+    def __init__(self, directory: str, num_shards: int = 0,
+                 cache_path: str = None) -> None:
+        """
+        Initialize the `Watcher` object.
+
+        `self.stats` maps each watched file to the modification time and
+        size it had when it was last extracted.
+
+        `self.cache` remembers the strings of every function extracted, so
+        that an edit to a single function of a large file only walks that
+        function again.
+
+        :param directory: root of the directory tree to watch
+        :param num_shards: number of bundle shards, 0 for a single bundle
+        :param cache_path: optional path the function cache persists to
+        :return: returns nothing
+        """
+        self.directory = directory
+        self.num_shards = num_shards
+        self.stats = {}
+        self.cache = FuncCache(cache_path)
+        self._intr = Interface()
+        self._astp = AstParser()
+
+    def run(self) -> None:
+        """
+        Watch the directory until interrupted.
+
+        Everything is extracted and the bundle written once up front, after
+        which only changes are processed.
+
+        :return: returns nothing
+        """
+        self.poll()
+        self.export()
+
+        dirty = False
+        last_change = 0.0
+
+        try:
+            while True:
+                time.sleep(self.POLL_INTERVAL)
+
+                if self.poll():
+                    dirty = True
+                    last_change = time.monotonic()
+
+                if dirty and time.monotonic() - last_change >= self.DEBOUNCE:
+                    self.export()
+                    dirty = False
+
+        except KeyboardInterrupt:
+            # Changes that were picked up but not yet written are not lost
+            # when the session is ended
+            if dirty:
+                self.export()
+
+    def poll(self) -> bool:
+        """
+        Re-extract every file which was added, changed or removed.
+
+        :return bool: true if any file changed, false otherwise
+        """
+        current = self.scan()
+        changed = False
+
+        for file_path, stat in current.items():
+            if self.stats.get(file_path) != stat:
+                self.extract(file_path)
+                changed = True
+
+        for file_path in self.stats.keys() - current.keys():
+            LOGGER.info("Removed: %s", file_path)
+            Record.remove_file(file_path)
+            self.cache.forget(file_path)
+            changed = True
+
+        self.stats = current
+        return changed
+
+    def scan(self) -> dict:
+        """
+        Collect the modification time and size of every watched file.
+
+        :return stats: dictionary of file path: (mtime, size)
+        """
+        stats = {}
+
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(self.EXTENSION):
+                    continue
+
+                file_path = os.path.join(root, name)
+
+                # A file may disappear between listing and stat when an
+                # editor replaces it through a rename
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+
+                stats[file_path] = (stat.st_mtime_ns, stat.st_size)
+
+        return stats
+
+    def extract(self, file_path: str) -> None:
+        """
+        Extract a single file and swap its contribution into `Record`.
+
+        Files which fail to pre-process or parse, which is common while
+        they are still being edited, keep their previous contribution.
+
+        :param file_path: file to be extracted
+        :return: returns nothing
+        """
+        LOGGER.info("Extracting: %s", file_path)
+
+        try:
+            occurrences = self.cache.extract(
+                file_path, self._intr.preprocess(file_path), self._intr,
+                self._astp)
+            pairs = [(func, string) for func, string, _, _ in occurrences]
+
+        except NoFunctionsFoundError:
+            pairs = []
+
+        except (CustomBaseError, c_parser.ParseError,
+                subprocess.CalledProcessError, RuntimeError, OSError) as err:
+            LOGGER.warning("Keeping previous strings of %s: %s",
+                           file_path, err)
+            return
+
+        Record.replace_file(file_path, pairs)
+
+    def export(self) -> None:
+        """
+        Rewrite the bundle from the current `Record` dictionary.
+
+        :return: returns nothing
+        """
+        if self.num_shards:
+            self._intr.drop_shards_to_disk(Record.str_func_dict,
+                                           self.num_shards)
+
+        else:
+            self._intr.convert_dict_to_json(Record.str_func_dict)
+            self._intr.drop_bundle_to_disk(self._intr.json_data)
+
+        LOGGER.info("Bundle updated with %d strings",
+                    len(Record.str_func_dict))
+
+        self.cache.save()